@@ -7,21 +7,21 @@ from sqlalchemy.orm import Session
 from typing import List
 from datetime import datetime, timedelta
 from app.db.database import get_db
-from app.db.models.user import User
 from app.db.models.appointment import Appointment, AppointmentStatus
 from app.db.models.patient import Patient
 from app.db.schemas.appointment import AppointmentCreate, AppointmentUpdate, AppointmentResponse, AppointmentWithPatientResponse
-from app.core.security import get_current_user, get_current_secretary_or_admin
+from app.db.rollups import track_appointment, apply_appointment_delta
+from app.core.security import CurrentUser, get_current_user, get_current_secretary_or_admin
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/appointments", tags=["مدیریت نوبت‌ها / Appointment Management"])
 
 
 @router.post("/", response_model=AppointmentResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد نوبت جدید")
-async def create_appointment(
+def create_appointment(
     appointment_data: AppointmentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Create new appointment (Secretary/Admin only)
@@ -54,6 +54,11 @@ async def create_appointment(
     new_appointment = Appointment(**appointment_data.model_dump())
     
     db.add(new_appointment)
+    db.flush()
+    
+    # Update daily rollup / بروزرسانی جدول تجمیعی روزانه
+    track_appointment(db, new_appointment)
+    
     db.commit()
     db.refresh(new_appointment)
     
@@ -61,12 +66,12 @@ async def create_appointment(
 
 
 @router.get("/", response_model=List[AppointmentWithPatientResponse], summary="دریافت لیست نوبت‌ها")
-async def get_appointments(
+def get_appointments(
     skip: int = 0,
     limit: int = 100,
     status_filter: AppointmentStatus = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get all appointments (Secretary/Admin only)
@@ -90,35 +95,35 @@ async def get_appointments(
 
 
 @router.get("/my", response_model=List[AppointmentResponse], summary="دریافت نوبت‌های من")
-async def get_my_appointments(
+def get_my_appointments(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get current user's appointments (Patient)
     دریافت نوبت‌های کاربر جاری (بیمار)
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    if not patient:
+    patient_id = current_user.patient_id
+    if patient_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=ERROR_MESSAGES["patient_not_found"]
         )
     
     appointments = db.query(Appointment).filter(
-        Appointment.patient_id == patient.id
+        Appointment.patient_id == patient_id
     ).order_by(Appointment.appointment_date.desc()).offset(skip).limit(limit).all()
     
     return [AppointmentResponse.model_validate(appt) for appt in appointments]
 
 
 @router.get("/{appointment_id}", response_model=AppointmentWithPatientResponse, summary="دریافت اطلاعات نوبت")
-async def get_appointment(
+def get_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get appointment by ID (Secretary/Admin only)
@@ -139,11 +144,11 @@ async def get_appointment(
 
 
 @router.put("/{appointment_id}", response_model=AppointmentResponse, summary="بروزرسانی نوبت")
-async def update_appointment(
+def update_appointment(
     appointment_id: int,
     appointment_data: AppointmentUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Update appointment (Secretary/Admin only)
@@ -156,11 +161,20 @@ async def update_appointment(
             detail=ERROR_MESSAGES["appointment_not_found"]
         )
     
+    old_date = appointment.appointment_date
+    old_status = appointment.status
+    
     # Update fields / بروزرسانی فیلدها
     update_data = appointment_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(appointment, field, value)
     
+    # Move the appointment between rollup buckets if its day or status changed
+    # جابجایی نوبت بین ردیف‌های تجمیعی در صورت تغییر روز یا وضعیت
+    if old_date.date() != appointment.appointment_date.date() or old_status != appointment.status:
+        apply_appointment_delta(db, old_date, old_status, -1)
+        track_appointment(db, appointment)
+    
     db.commit()
     db.refresh(appointment)
     
@@ -168,10 +182,10 @@ async def update_appointment(
 
 
 @router.delete("/{appointment_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف نوبت")
-async def delete_appointment(
+def delete_appointment(
     appointment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Delete appointment (Secretary/Admin only)
@@ -184,6 +198,7 @@ async def delete_appointment(
             detail=ERROR_MESSAGES["appointment_not_found"]
         )
     
+    track_appointment(db, appointment, delta=-1)
     db.delete(appointment)
     db.commit()
     
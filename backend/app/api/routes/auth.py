@@ -2,12 +2,18 @@
 Authentication routes
 مسیرهای احراز هویت
 """
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db.models.user import User
 from app.db.schemas.user import LoginRequest, TokenResponse, UserResponse
-from app.core.security import verify_password, create_access_token, create_refresh_token, decode_token
+from app.core.security import security, verify_and_update_password_async, create_user_access_token, create_refresh_token, decode_token
+from app.core.revocation import revoked_tokens, refresh_token_id
+from app.core.rate_limit import login_limiter
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/auth", tags=["احراز هویت / Authentication"])
@@ -18,16 +24,35 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     """
     Login with phone number and password
     ورود با شماره تلفن و رمز عبور
+    
+    The query runs in the threadpool and bcrypt in the password hash pool,
+    so a burst of logins neither blocks the event loop nor holds request threads
+    کوئری در استخر نخ و bcrypt در استخر رمزنگاری اجرا می‌شود
     """
+    # Per-number limit before any query or bcrypt work; the per-IP limit
+    # is applied earlier by LoginRateLimitMiddleware
+    # محدودیت هر شماره پیش از هر کوئری یا bcrypt؛ محدودیت IP در میان‌افزار اعمال می‌شود
+    login_limiter.check_phone(login_data.phone_number)
+    
     # Find user by phone number / یافتن کاربر با شماره تلفن
-    user = db.query(User).filter(User.phone_number == login_data.phone_number).first()
+    user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.phone_number == login_data.phone_number).first()
+    )
+    
+    verified, new_hash = False, None
+    if user:
+        verified, new_hash = await verify_and_update_password_async(login_data.password, user.password_hash)
     
-    if not user or not verify_password(login_data.password, user.password_hash):
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=ERROR_MESSAGES["invalid_credentials"]
         )
     
+    # Only failed attempts count against the number, as for the IP
+    # فقط تلاش‌های ناموفق از سهمیه شماره کم می‌شوند، مانند IP
+    login_limiter.refund_phone(login_data.phone_number)
+    
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -35,18 +60,41 @@ async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
         )
     
     # Create tokens / ایجاد توکن‌ها
-    access_token = create_access_token(data={"sub": user.id})
+    access_token = await run_in_threadpool(create_user_access_token, db, user)
     refresh_token = create_refresh_token(data={"sub": user.id})
     
-    return TokenResponse(
+    response = TokenResponse(
         access_token=access_token,
         refresh_token=refresh_token,
         user=UserResponse.model_validate(user)
     )
+    
+    # Hash made with an outdated scheme or cost: store the new one
+    # هش با الگوریتم یا هزینه قدیمی: ذخیره هش جدید
+    if new_hash:
+        await run_in_threadpool(_store_password_hash, db, user.id, new_hash)
+    
+    return response
+
+
+def _store_password_hash(db: Session, user_id: int, password_hash: str) -> None:
+    """
+    Replace a user's password hash after a rehash on login
+    جایگزینی هش رمز عبور کاربر پس از بازرمزنگاری در ورود
+    
+    A bulk UPDATE, so the session listeners do not treat it as an account
+    change that revokes the user's tokens
+    به صورت UPDATE مستقیم تا به عنوان تغییر حساب و ابطال توکن‌ها در نظر گرفته نشود
+    """
+    db.execute(
+        update(User).where(User.id == user_id).values(password_hash=password_hash),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
 
 
 @router.post("/refresh", response_model=TokenResponse, summary="تازه‌سازی توکن")
-async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
     """
     Refresh access token using refresh token
     تازه‌سازی توکن دسترسی با استفاده از توکن تازه‌سازی
@@ -66,6 +114,15 @@ async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
             detail=ERROR_MESSAGES["invalid_token"]
         )
     
+    # Rotation: revoking the presented token succeeds only once, so a
+    # replayed refresh token is rejected, including tokens issued without a jti
+    # هر توکن تازه‌سازی، حتی توکن‌های قدیمی بدون jti، فقط یک بار قابل استفاده است
+    if not revoked_tokens.revoke(refresh_token_id(refresh_token, payload), payload["exp"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES["invalid_token"]
+        )
+    
     user = db.query(User).filter(User.id == user_id).first()
     if not user or not user.is_active:
         raise HTTPException(
@@ -74,11 +131,42 @@ async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
         )
     
     # Create new tokens / ایجاد توکن‌های جدید
-    new_access_token = create_access_token(data={"sub": user.id})
+    new_access_token = create_user_access_token(db, user)
     new_refresh_token = create_refresh_token(data={"sub": user.id})
     
     return TokenResponse(
         access_token=new_access_token,
         refresh_token=new_refresh_token,
         user=UserResponse.model_validate(user)
-    )
\ No newline at end of file
+    )
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="خروج از سیستم")
+def logout(
+    refresh_token: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    """
+    Logout by revoking the access token and, if given, the refresh token
+    خروج با ابطال توکن دسترسی و در صورت ارسال، توکن تازه‌سازی
+    """
+    payload = decode_token(credentials.credentials)
+    if payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=ERROR_MESSAGES["invalid_token"]
+        )
+    
+    if payload.get("jti") is not None:
+        revoked_tokens.revoke(payload["jti"], payload["exp"])
+    
+    if refresh_token:
+        refresh_payload = decode_token(refresh_token)
+        if refresh_payload.get("type") != "refresh" or refresh_payload.get("sub") != payload.get("sub"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=ERROR_MESSAGES["invalid_token"]
+            )
+        revoked_tokens.revoke(refresh_token_id(refresh_token, refresh_payload), refresh_payload["exp"])
+    
+    return None
@@ -6,21 +6,20 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
-from app.db.models.user import User
 from app.db.models.factor import Factor
 from app.db.models.patient import Patient
 from app.db.schemas.factor import FactorCreate, FactorUpdate, FactorResponse, FactorWithPatientResponse
-from app.core.security import get_current_user, get_current_secretary_or_admin
+from app.core.security import CurrentUser, get_current_user, get_current_secretary_or_admin
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/factors", tags=["مدیریت فاکتورها / Factor Management"])
 
 
 @router.post("/", response_model=FactorResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد فاکتور جدید")
-async def create_factor(
+def create_factor(
     factor_data: FactorCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Create new factor record (Secretary/Admin only)
@@ -45,12 +44,12 @@ async def create_factor(
 
 
 @router.get("/", response_model=List[FactorWithPatientResponse], summary="دریافت لیست فاکتورها")
-async def get_factors(
+def get_factors(
     skip: int = 0,
     limit: int = 100,
     patient_id: int = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get all factors (Secretary/Admin only)
@@ -73,35 +72,35 @@ async def get_factors(
 
 
 @router.get("/my", response_model=List[FactorResponse], summary="دریافت فاکتورهای من")
-async def get_my_factors(
+def get_my_factors(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get current user's factors (Patient)
     دریافت فاکتورهای کاربر جاری (بیمار)
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    if not patient:
+    patient_id = current_user.patient_id
+    if patient_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=ERROR_MESSAGES["patient_not_found"]
         )
     
     factors = db.query(Factor).filter(
-        Factor.patient_id == patient.id
+        Factor.patient_id == patient_id
     ).order_by(Factor.administration_date.desc()).offset(skip).limit(limit).all()
     
     return [FactorResponse.model_validate(factor) for factor in factors]
 
 
 @router.get("/{factor_id}", response_model=FactorWithPatientResponse, summary="دریافت اطلاعات فاکتور")
-async def get_factor(
+def get_factor(
     factor_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get factor by ID
@@ -116,8 +115,8 @@ async def get_factor(
     
     # Check access / بررسی دسترسی
     if current_user.role == "Patient":
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient or factor.patient_id != patient.id:
+        patient_id = current_user.patient_id
+        if patient_id is None or factor.patient_id != patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERROR_MESSAGES["permission_denied"]
@@ -130,11 +129,11 @@ async def get_factor(
 
 
 @router.put("/{factor_id}", response_model=FactorResponse, summary="بروزرسانی فاکتور")
-async def update_factor(
+def update_factor(
     factor_id: int,
     factor_data: FactorUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Update factor (Secretary/Admin only)
@@ -159,10 +158,10 @@ async def update_factor(
 
 
 @router.delete("/{factor_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف فاکتور")
-async def delete_factor(
+def delete_factor(
     factor_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Delete factor (Secretary/Admin only)
@@ -6,21 +6,20 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
-from app.db.models.user import User
 from app.db.models.insurance import Insurance
 from app.db.models.patient import Patient
 from app.db.schemas.insurance import InsuranceCreate, InsuranceUpdate, InsuranceResponse, InsuranceWithPatientResponse
-from app.core.security import get_current_user, get_current_secretary_or_admin
+from app.core.security import CurrentUser, get_current_user, get_current_secretary_or_admin
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/insurances", tags=["مدیریت بیمه‌ها / Insurance Management"])
 
 
 @router.post("/", response_model=InsuranceResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد بیمه جدید")
-async def create_insurance(
+def create_insurance(
     insurance_data: InsuranceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Create new insurance (Secretary/Admin only)
@@ -53,11 +52,11 @@ async def create_insurance(
 
 
 @router.get("/", response_model=List[InsuranceWithPatientResponse], summary="دریافت لیست بیمه‌ها")
-async def get_insurances(
+def get_insurances(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get all insurances (Secretary/Admin only)
@@ -75,22 +74,22 @@ async def get_insurances(
 
 
 @router.get("/my", response_model=InsuranceResponse, summary="دریافت بیمه من")
-async def get_my_insurance(
+def get_my_insurance(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get current user's insurance (Patient)
     دریافت بیمه کاربر جاری (بیمار)
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    if not patient:
+    patient_id = current_user.patient_id
+    if patient_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=ERROR_MESSAGES["patient_not_found"]
         )
     
-    insurance = db.query(Insurance).filter(Insurance.patient_id == patient.id).first()
+    insurance = db.query(Insurance).filter(Insurance.patient_id == patient_id).first()
     if not insurance:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -101,10 +100,10 @@ async def get_my_insurance(
 
 
 @router.get("/{insurance_id}", response_model=InsuranceWithPatientResponse, summary="دریافت اطلاعات بیمه")
-async def get_insurance(
+def get_insurance(
     insurance_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get insurance by ID
@@ -119,8 +118,8 @@ async def get_insurance(
     
     # Check access / بررسی دسترسی
     if current_user.role == "Patient":
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient or insurance.patient_id != patient.id:
+        patient_id = current_user.patient_id
+        if patient_id is None or insurance.patient_id != patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERROR_MESSAGES["permission_denied"]
@@ -133,11 +132,11 @@ async def get_insurance(
 
 
 @router.put("/{insurance_id}", response_model=InsuranceResponse, summary="بروزرسانی بیمه")
-async def update_insurance(
+def update_insurance(
     insurance_id: int,
     insurance_data: InsuranceUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Update insurance (Secretary/Admin only)
@@ -162,10 +161,10 @@ async def update_insurance(
 
 
 @router.delete("/{insurance_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف بیمه")
-async def delete_insurance(
+def delete_insurance(
     insurance_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Delete insurance (Secretary/Admin only)
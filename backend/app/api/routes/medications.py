@@ -6,20 +6,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
-from app.db.models.user import User
 from app.db.models.medication import Medication
 from app.db.schemas.medication import MedicationCreate, MedicationUpdate, MedicationResponse
-from app.core.security import get_current_admin, get_current_user
+from app.core.security import CurrentUser, get_current_admin, get_current_user
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/medications", tags=["مدیریت داروها / Medication Management"])
 
 
 @router.post("/", response_model=MedicationResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد دارو جدید")
-async def create_medication(
+def create_medication(
     medication_data: MedicationCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Create new medication (Admin only)
@@ -44,12 +43,12 @@ async def create_medication(
 
 
 @router.get("/", response_model=List[MedicationResponse], summary="دریافت لیست داروها")
-async def get_medications(
+def get_medications(
     skip: int = 0,
     limit: int = 100,
     search: str = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get all medications
@@ -65,10 +64,10 @@ async def get_medications(
 
 
 @router.get("/{medication_id}", response_model=MedicationResponse, summary="دریافت اطلاعات دارو")
-async def get_medication(
+def get_medication(
     medication_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get medication by ID
@@ -85,11 +84,11 @@ async def get_medication(
 
 
 @router.put("/{medication_id}", response_model=MedicationResponse, summary="بروزرسانی دارو")
-async def update_medication(
+def update_medication(
     medication_id: int,
     medication_data: MedicationUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Update medication (Admin only)
@@ -114,10 +113,10 @@ async def update_medication(
 
 
 @router.delete("/{medication_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف دارو")
-async def delete_medication(
+def delete_medication(
     medication_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Delete medication (Admin only)
@@ -0,0 +1,64 @@
+"""
+Runtime metrics routes
+مسیرهای معیارهای زمان اجرا
+"""
+from fastapi import APIRouter, Depends
+from typing import Any, Dict
+from app.core.security import CurrentUser, get_current_admin, password_hash_pool, pwd_context
+from app.core.loop_monitor import loop_monitor
+from app.core.cache import auth_user_cache
+from app.core.rate_limit import login_limiter
+from app.core.revocation import revoked_tokens, token_revocations
+
+router = APIRouter(prefix="/metrics", tags=["معیارها / Metrics"])
+
+
+@router.get("/event-loop", summary="تاخیر حلقه رویداد")
+async def get_event_loop_metrics(current_user: CurrentUser = Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Get event loop lag percentiles and recently detected blocking routes (Admin only)
+    دریافت صدک‌های تاخیر حلقه رویداد و مسیرهای مسدود کننده اخیر (فقط مدیر)
+    
+    Sampling is off unless EVENT_LOOP_MONITOR_ENABLED is set
+    نمونه‌برداری فقط با فعال بودن EVENT_LOOP_MONITOR_ENABLED انجام می‌شود
+    """
+    return loop_monitor.stats()
+
+
+@router.get("/password-hashing", summary="معیارهای استخر رمزنگاری")
+async def get_password_hashing_metrics(current_user: CurrentUser = Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Get password hash pool load, queue-wait percentiles and the active scheme (Admin only)
+    دریافت بار استخر رمزنگاری، صدک‌های زمان انتظار در صف و الگوریتم فعال (فقط مدیر)
+    """
+    return {**password_hash_pool.stats(), "scheme": pwd_context.default_scheme()}
+
+
+@router.get("/auth-cache", summary="آمار کش کاربران احراز هویت")
+async def get_auth_cache_metrics(current_user: CurrentUser = Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Get authenticated user cache counters and revocation store sizes (Admin only)
+    دریافت آمار کش کاربران احراز هویت و مخازن ابطال (فقط مدیر)
+    """
+    return {
+        **auth_user_cache.stats(),
+        "revoked_users": len(token_revocations),
+        "revoked_tokens": revoked_tokens.stats(),
+    }
+
+
+@router.get("/login-limits", summary="آمار محدودیت نرخ ورود")
+async def get_login_limit_metrics(current_user: CurrentUser = Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Get rejected login attempts and the bcrypt time they saved (Admin only)
+    دریافت تعداد تلاش‌های ورود رد شده و زمان bcrypt صرفه‌جویی شده (فقط مدیر)
+    """
+    stats = login_limiter.stats()
+    rejected = stats["ip"]["rejected"] + stats["phone"]["rejected"]
+    
+    # Each rejected attempt skips one password verification
+    # هر تلاش رد شده یک بررسی رمز عبور را حذف می‌کند
+    hash_ms = password_hash_pool.stats()["hash_ms"]["p50"]
+    stats["rejected"] = rejected
+    stats["hash_seconds_saved"] = round(rejected * hash_ms / 1000, 2) if hash_ms is not None else None
+    return stats
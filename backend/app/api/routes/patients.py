@@ -9,17 +9,18 @@ from app.db.database import get_db
 from app.db.models.user import User
 from app.db.models.patient import Patient
 from app.db.schemas.patient import PatientCreate, PatientUpdate, PatientResponse, PatientWithUserResponse
-from app.core.security import get_current_user, get_current_secretary_or_admin
+from app.db.rollups import untrack_patient_appointments
+from app.core.security import CurrentUser, get_current_user, get_current_secretary_or_admin
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/patients", tags=["مدیریت بیماران / Patient Management"])
 
 
 @router.post("/", response_model=PatientResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد بیمار جدید")
-async def create_patient(
+def create_patient(
     patient_data: PatientCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Create new patient (Secretary/Admin only)
@@ -52,11 +53,11 @@ async def create_patient(
 
 
 @router.get("/", response_model=List[PatientWithUserResponse], summary="دریافت لیست بیماران")
-async def get_patients(
+def get_patients(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get all patients (Secretary/Admin only)
@@ -75,9 +76,9 @@ async def get_patients(
 
 
 @router.get("/me", response_model=PatientResponse, summary="دریافت اطلاعات بیمار جاری")
-async def get_my_patient_info(
+def get_my_patient_info(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get current user's patient information
@@ -94,10 +95,10 @@ async def get_my_patient_info(
 
 
 @router.get("/{patient_id}", response_model=PatientWithUserResponse, summary="دریافت اطلاعات بیمار")
-async def get_patient(
+def get_patient(
     patient_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get patient by ID (Secretary/Admin only)
@@ -118,11 +119,11 @@ async def get_patient(
 
 
 @router.put("/{patient_id}", response_model=PatientResponse, summary="بروزرسانی بیمار")
-async def update_patient(
+def update_patient(
     patient_id: int,
     patient_data: PatientUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Update patient (Secretary/Admin only)
@@ -147,10 +148,10 @@ async def update_patient(
 
 
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف بیمار")
-async def delete_patient(
+def delete_patient(
     patient_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Delete patient (Secretary/Admin only)
@@ -163,6 +164,8 @@ async def delete_patient(
             detail=ERROR_MESSAGES["patient_not_found"]
         )
     
+    # Appointments are removed by cascade / نوبت‌ها به صورت آبشاری حذف می‌شوند
+    untrack_patient_appointments(db, patient.id)
     db.delete(patient)
     db.commit()
     
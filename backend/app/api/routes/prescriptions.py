@@ -6,22 +6,21 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.db.database import get_db
-from app.db.models.user import User
 from app.db.models.prescription import Prescription, PrescriptionItem
 from app.db.models.patient import Patient
 from app.db.models.medication import Medication
 from app.db.schemas.prescription import PrescriptionCreate, PrescriptionUpdate, PrescriptionResponse, PrescriptionWithPatientResponse
-from app.core.security import get_current_user, get_current_secretary_or_admin
+from app.core.security import CurrentUser, get_current_user, get_current_secretary_or_admin
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/prescriptions", tags=["مدیریت نسخه‌ها / Prescription Management"])
 
 
 @router.post("/", response_model=PrescriptionResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد نسخه جدید")
-async def create_prescription(
+def create_prescription(
     prescription_data: PrescriptionCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Create new prescription (Secretary/Admin only)
@@ -76,12 +75,12 @@ async def create_prescription(
 
 
 @router.get("/", response_model=List[PrescriptionWithPatientResponse], summary="دریافت لیست نسخه‌ها")
-async def get_prescriptions(
+def get_prescriptions(
     skip: int = 0,
     limit: int = 100,
     patient_id: int = None,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Get all prescriptions (Secretary/Admin only)
@@ -110,25 +109,25 @@ async def get_prescriptions(
 
 
 @router.get("/my", response_model=List[PrescriptionResponse], summary="دریافت نسخه‌های من")
-async def get_my_prescriptions(
+def get_my_prescriptions(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get current user's prescriptions (Patient)
     دریافت نسخه‌های کاربر جاری (بیمار)
     """
-    patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-    if not patient:
+    patient_id = current_user.patient_id
+    if patient_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=ERROR_MESSAGES["patient_not_found"]
         )
     
     prescriptions = db.query(Prescription).filter(
-        Prescription.patient_id == patient.id
+        Prescription.patient_id == patient_id
     ).order_by(Prescription.created_at.desc()).offset(skip).limit(limit).all()
     
     result = []
@@ -144,10 +143,10 @@ async def get_my_prescriptions(
 
 
 @router.get("/{prescription_id}", response_model=PrescriptionWithPatientResponse, summary="دریافت اطلاعات نسخه")
-async def get_prescription(
+def get_prescription(
     prescription_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get prescription by ID
@@ -162,8 +161,8 @@ async def get_prescription(
     
     # Check access / بررسی دسترسی
     if current_user.role == "Patient":
-        patient = db.query(Patient).filter(Patient.user_id == current_user.id).first()
-        if not patient or prescription.patient_id != patient.id:
+        patient_id = current_user.patient_id
+        if patient_id is None or prescription.patient_id != patient_id:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=ERROR_MESSAGES["permission_denied"]
@@ -181,11 +180,11 @@ async def get_prescription(
 
 
 @router.put("/{prescription_id}", response_model=PrescriptionResponse, summary="بروزرسانی نسخه")
-async def update_prescription(
+def update_prescription(
     prescription_id: int,
     prescription_data: PrescriptionUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Update prescription (Secretary/Admin only)
@@ -215,10 +214,10 @@ async def update_prescription(
 
 
 @router.delete("/{prescription_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف نسخه")
-async def delete_prescription(
+def delete_prescription(
     prescription_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Delete prescription (Secretary/Admin only)
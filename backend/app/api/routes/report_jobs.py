@@ -0,0 +1,422 @@
+"""
+Background report job routes
+مسیرهای کارهای پس‌زمینه گزارش
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+import csv
+import json
+import os
+import re
+import threading
+import uuid
+from app.core.config import settings
+from app.core.security import CurrentUser, get_current_admin
+from app.db.database import SessionLocal
+from app.db.schemas.report import ReportExportRequest, ReportJobResponse
+from app.api.routes.reports import (
+    ReportTooLargeError,
+    _stream_rows,
+    PatientDetailReport,
+    FactorDetailReport,
+    PrescriptionDetailReport,
+    AppointmentDetailReport,
+    _patients_report_query,
+    _patient_report_row,
+    _factors_report_query,
+    _prescriptions_report_query,
+    _prescription_report_item,
+    _appointments_report_query,
+    _appointment_report_item,
+)
+from app.utils.messages_fa import ERROR_MESSAGES
+
+router = APIRouter(prefix="/reports/jobs", tags=["کارهای گزارش / Report Jobs"])
+
+REPORT_FORMATS = {"csv": "text/csv", "json": "application/json"}
+
+# Default date range (days) per report type, matching the interactive endpoints
+# بازه پیش‌فرض (روز) برای هر نوع گزارش، مطابق مسیرهای تعاملی
+REPORT_DEFAULT_DAYS = {
+    "patients": None,
+    "factors": 180,
+    "prescriptions": 90,
+    "appointments": 30,
+}
+
+
+# Job ids are uuid4 hex; anything else never names a job file
+# شناسه کارها uuid4 به صورت hex است؛ مقدار دیگری نام فایل کار نیست
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+# How often a running job writes its progress to the metadata file (rows)
+# تعداد سطرهای نوشته شده بین هر ذخیره پیشرفت کار در فایل اطلاعات
+PROGRESS_SAVE_ROWS = 1000
+
+
+def _metadata_path(job_id: str) -> str:
+    """JSON sidecar next to the job's report file / فایل JSON اطلاعات کار در کنار فایل گزارش"""
+    return os.path.join(settings.REPORT_JOB_DIR, f"{job_id}.meta.json")
+
+
+class ReportJob:
+    """
+    State of one background report job
+    وضعیت یک کار پس‌زمینه گزارش
+
+    The state is saved as a JSON sidecar in REPORT_JOB_DIR, so the status and
+    download requests can be served by any worker, not only the one running the job.
+    Every job has a deadline from submission: one still queued or running after
+    it (e.g. its worker crashed or shut down) is reported as failed and expires.
+    وضعیت در فایل JSON کنار فایل گزارش ذخیره می‌شود تا هر کارگری بتواند به درخواست‌ها پاسخ دهد؛
+    کاری که پس از مهلت خود هنوز در صف یا در حال اجرا باشد ناموفق در نظر گرفته می‌شود.
+    """
+
+    def __init__(self, user_id: int, spec: ReportExportRequest, job_id: Optional[str] = None):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.spec = spec
+        self.status = "queued"
+        self.rows_written = 0
+        self.total_rows: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.deadline = self.created_at + timedelta(minutes=settings.REPORT_JOB_MAX_RUNTIME_MINUTES)
+        self.finished_at: Optional[datetime] = None
+        self.expires_at: Optional[datetime] = None
+        self.file_path = os.path.join(settings.REPORT_JOB_DIR, f"{self.job_id}.{spec.format}")
+
+    def save(self) -> None:
+        """Write the metadata file atomically / نوشتن اتمیک فایل اطلاعات"""
+        metadata = {
+            "job_id": self.job_id,
+            "user_id": self.user_id,
+            "spec": self.spec.model_dump(mode="json"),
+            "status": self.status,
+            "rows_written": self.rows_written,
+            "total_rows": self.total_rows,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "deadline": self.deadline.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "expires_at": self.expires_at.isoformat() if self.expires_at else None,
+        }
+        path = _metadata_path(self.job_id)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as output:
+            json.dump(metadata, output)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, job_id: str) -> Optional["ReportJob"]:
+        """Read a job from its metadata file / خواندن کار از فایل اطلاعات"""
+        try:
+            with open(_metadata_path(job_id), encoding="utf-8") as source:
+                metadata = json.load(source)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        job = cls(metadata["user_id"], ReportExportRequest(**metadata["spec"]), job_id=job_id)
+        job.status = metadata["status"]
+        job.rows_written = metadata["rows_written"]
+        job.total_rows = metadata["total_rows"]
+        job.error = metadata["error"]
+        job.created_at = datetime.fromisoformat(metadata["created_at"])
+        if metadata.get("deadline"):
+            job.deadline = datetime.fromisoformat(metadata["deadline"])
+        if metadata["finished_at"]:
+            job.finished_at = datetime.fromisoformat(metadata["finished_at"])
+        if metadata["expires_at"]:
+            job.expires_at = datetime.fromisoformat(metadata["expires_at"])
+
+        # Left unfinished by a crashed or stopped worker / رها شده توسط کارگر متوقف شده
+        if job.status in ("queued", "running") and job.deadline <= datetime.now():
+            job.error = ERROR_MESSAGES["report_job_timed_out"]
+            job.finish("failed", job.deadline)
+        return job
+
+    def finish(self, status: str, finished_at: datetime) -> None:
+        """Record the final state and start the result TTL / ثبت وضعیت نهایی و شروع مهلت نگهداری"""
+        self.status = status
+        self.finished_at = finished_at
+        self.expires_at = finished_at + timedelta(minutes=settings.REPORT_JOB_RESULT_TTL_MINUTES)
+        self.save()
+
+    def to_response(self) -> ReportJobResponse:
+        if self.status == "completed":
+            progress = 1.0
+        elif self.total_rows:
+            progress = min(self.rows_written / self.total_rows, 1.0)
+        else:
+            progress = 0.0
+
+        return ReportJobResponse(
+            job_id=self.job_id,
+            status=self.status,
+            report_type=self.spec.report_type,
+            format=self.spec.format,
+            rows_written=self.rows_written,
+            total_rows=self.total_rows,
+            progress=progress,
+            error=self.error,
+            created_at=self.created_at,
+            deadline=self.deadline,
+            finished_at=self.finished_at,
+            expires_at=self.expires_at
+        )
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.REPORT_JOB_WORKERS,
+    thread_name_prefix="report-job"
+)
+# Jobs queued or running in this worker, for the queue limit
+# کارهای در صف یا در حال اجرای این کارگر، برای محدودیت صف
+_active_jobs: Dict[str, ReportJob] = {}
+_jobs_lock = threading.Lock()
+_sweeper_stop = threading.Event()
+
+
+def start_sweeper() -> None:
+    """Purge expired jobs every REPORT_JOB_SWEEP_SECONDS / پاکسازی دوره‌ای کارهای منقضی شده"""
+    def sweep():
+        while not _sweeper_stop.wait(settings.REPORT_JOB_SWEEP_SECONDS):
+            try:
+                purge_expired_jobs()
+            except OSError:
+                pass
+
+    _sweeper_stop.clear()
+    threading.Thread(target=sweep, name="report-job-sweeper", daemon=True).start()
+
+
+def shutdown_workers() -> None:
+    """Stop the sweeper and the worker pool without waiting for running jobs / توقف پاکسازی و مخزن کارگرها"""
+    _sweeper_stop.set()
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+def purge_expired_jobs() -> int:
+    """
+    Delete expired jobs' report, partial and metadata files
+    حذف فایل‌های گزارش، ناقص و اطلاعات کارهای منقضی شده
+
+    Loading a job also fails it once its deadline has passed, so jobs
+    abandoned by a stopped worker expire as well. Returns the number of jobs removed.
+    بارگذاری کار پس از پایان مهلت آن را ناموفق می‌کند تا کارهای رها شده نیز منقضی شوند.
+    """
+    if not os.path.isdir(settings.REPORT_JOB_DIR):
+        return 0
+
+    now = datetime.now()
+    purged = 0
+    for name in os.listdir(settings.REPORT_JOB_DIR):
+        if not name.endswith(".meta.json"):
+            continue
+        job = ReportJob.load(name[:-len(".meta.json")])
+        if job is None or not job.expires_at or job.expires_at > now:
+            continue
+        for path in (job.file_path, job.file_path + ".part", _metadata_path(job.job_id)):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        purged += 1
+    return purged
+
+
+def _report_rows(db, spec: ReportExportRequest):
+    """
+    Return (total row count, iterator of report items) for a job spec
+    برگرداندن (تعداد کل سطرها، پیمایشگر آیتم‌های گزارش) برای مشخصات کار
+
+    The count is a second scan of the report query, so it is only run when
+    the job asks for progress (count_rows); otherwise it is None.
+    شمارش یک اجرای دوباره کوئری است و فقط با count_rows انجام می‌شود.
+    """
+    start_date, end_date = spec.start_date, spec.end_date
+    default_days = REPORT_DEFAULT_DAYS[spec.report_type]
+    if default_days is not None:
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(days=default_days)
+
+    if spec.report_type == "patients":
+        query = _patients_report_query(db, start_date, end_date, None, None)
+        convert = _patient_report_row
+    elif spec.report_type == "factors":
+        query = _factors_report_query(db, start_date, end_date, None, None, None)
+        convert = lambda row: FactorDetailReport(**row._asdict())
+    elif spec.report_type == "prescriptions":
+        query = _prescriptions_report_query(db, start_date, end_date, None, None)
+        convert = lambda presc: _prescription_report_item(presc, None)
+    else:
+        query = _appointments_report_query(db, start_date, end_date, None, None)
+        convert = _appointment_report_item
+
+    total_rows = query.count() if spec.count_rows else None
+    rows = _stream_rows(query, settings.REPORT_JOB_MAX_ROWS)
+    return total_rows, (convert(row) for row in rows)
+
+
+REPORT_FIELDS = {
+    "patients": list(PatientDetailReport.model_fields),
+    "factors": list(FactorDetailReport.model_fields),
+    "prescriptions": list(PrescriptionDetailReport.model_fields),
+    "appointments": list(AppointmentDetailReport.model_fields),
+}
+
+
+def _save_progress(job: ReportJob) -> None:
+    """Save progress, stopping the job once its deadline has passed / ذخیره پیشرفت و توقف کار پس از مهلت"""
+    if datetime.now() >= job.deadline:
+        raise TimeoutError(ERROR_MESSAGES["report_job_timed_out"])
+    job.save()
+
+
+def _run_job(job: ReportJob) -> None:
+    """Generate a report file in a worker thread / تولید فایل گزارش در نخ کارگر"""
+    temp_path = job.file_path + ".part"
+    final_status = "failed"
+    db = SessionLocal()
+    try:
+        # Waited in the queue past its deadline / انتظار در صف بیش از مهلت
+        if datetime.now() >= job.deadline:
+            raise TimeoutError(ERROR_MESSAGES["report_job_timed_out"])
+        job.status = "running"
+        job.save()
+
+        # No statement may outlive the job / هیچ کوئری نباید از مهلت کار فراتر رود
+        remaining = job.deadline - datetime.now()
+        db.info["statement_timeout_ms"] = max(1, int(remaining.total_seconds() * 1000))
+
+        job.total_rows, items = _report_rows(db, job.spec)
+
+        with open(temp_path, "w", encoding="utf-8", newline="") as output:
+            if job.spec.format == "csv":
+                writer = csv.DictWriter(output, fieldnames=REPORT_FIELDS[job.spec.report_type])
+                writer.writeheader()
+                for item in items:
+                    row = item.model_dump()
+                    # Nested values (e.g. prescription medications) are stored as JSON text
+                    # مقادیر تو در تو (مانند داروهای نسخه) به صورت متن JSON ذخیره می‌شوند
+                    for field, value in row.items():
+                        if isinstance(value, (list, dict)):
+                            row[field] = json.dumps(value, ensure_ascii=False, default=str)
+                    writer.writerow(row)
+                    job.rows_written += 1
+                    if job.rows_written % PROGRESS_SAVE_ROWS == 0:
+                        _save_progress(job)
+            else:
+                output.write("[")
+                for item in items:
+                    if job.rows_written:
+                        output.write(",")
+                    output.write(item.model_dump_json())
+                    job.rows_written += 1
+                    if job.rows_written % PROGRESS_SAVE_ROWS == 0:
+                        _save_progress(job)
+                output.write("]")
+
+        os.replace(temp_path, job.file_path)
+        final_status = "completed"
+    except Exception as e:
+        job.error = ERROR_MESSAGES["report_job_too_large"] if isinstance(e, ReportTooLargeError) else str(e)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    finally:
+        db.close()
+        job.finish(final_status, datetime.now())
+        with _jobs_lock:
+            _active_jobs.pop(job.job_id, None)
+
+
+def _get_user_job(job_id: str, current_user: CurrentUser) -> ReportJob:
+    """Find a job owned by the current user / یافتن کار متعلق به کاربر جاری"""
+    job = ReportJob.load(job_id) if JOB_ID_PATTERN.match(job_id) else None
+    expired = job is not None and job.expires_at is not None and job.expires_at <= datetime.now()
+    if not job or expired or job.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES["report_job_not_found"]
+        )
+    return job
+
+
+@router.post("/", response_model=ReportJobResponse, status_code=status.HTTP_202_ACCEPTED,
+             summary="ثبت کار تولید گزارش")
+def submit_report_job(
+    spec: ReportExportRequest,
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Submit a report to be generated in the background (Admin only)
+    ثبت گزارش برای تولید در پس‌زمینه (فقط مدیر)
+
+    report_type: patients, factors, prescriptions or appointments; format: csv or json
+    نوع گزارش: patients، factors، prescriptions یا appointments؛ فرمت: csv یا json
+    """
+    if spec.report_type not in REPORT_DEFAULT_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES["invalid_report_type"]
+        )
+
+    if spec.format not in REPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES["invalid_report_format"]
+        )
+
+    with _jobs_lock:
+        if len(_active_jobs) >= settings.REPORT_JOB_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=ERROR_MESSAGES["report_job_queue_full"]
+            )
+
+        job = ReportJob(current_user.id, spec)
+        _active_jobs[job.job_id] = job
+
+    os.makedirs(settings.REPORT_JOB_DIR, exist_ok=True)
+    job.save()
+    _executor.submit(_run_job, job)
+
+    return job.to_response()
+
+
+@router.get("/{job_id}", response_model=ReportJobResponse, summary="وضعیت کار گزارش")
+def get_report_job(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Get status and progress of a report job (Admin only)
+    دریافت وضعیت و پیشرفت کار گزارش (فقط مدیر)
+    """
+    return _get_user_job(job_id, current_user).to_response()
+
+
+@router.get("/{job_id}/download", summary="دریافت فایل گزارش")
+def download_report_job(
+    job_id: str,
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Download the finished report file (Admin only)
+    دریافت فایل گزارش تکمیل شده (فقط مدیر)
+    """
+    job = _get_user_job(job_id, current_user)
+    if job.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=ERROR_MESSAGES["report_job_not_ready"]
+        )
+
+    return FileResponse(
+        job.file_path,
+        media_type=REPORT_FORMATS[job.spec.format],
+        filename=f"{job.spec.report_type}_report.{job.spec.format}"
+    )
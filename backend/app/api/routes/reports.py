@@ -2,15 +2,23 @@
 Advanced Reports routes
 مسیرهای گزارشات پیشرفته
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.orm import Session, joinedload, selectinload, contains_eager
+from sqlalchemy import func, and_, or_, desc, case, true, Date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import date, datetime, timedelta
 import csv
 import io
-from app.db.database import get_db
+import itertools
+import base64
+import json
+import zlib
+import re
+import typing
+import zipfile
+from xml.sax.saxutils import escape as xml_escape
+from app.db.database import get_budgeted_db
 from app.db.models.user import User
 from app.db.models.appointment import Appointment, AppointmentStatus
 from app.db.models.patient import Patient
@@ -18,11 +26,81 @@ from app.db.models.prescription import Prescription, PrescriptionItem
 from app.db.models.medication import Medication
 from app.db.models.factor import Factor
 from app.db.models.insurance import Insurance
-from app.core.security import get_current_admin, get_current_user
-from pydantic import BaseModel
+from app.db.models.report import DailyAppointmentRollup
+from app.db.tombstones import deleted_ids_since, oldest_delta_watermark
+from app.db.schemas.report import (
+    DailyAppointmentReport, ActivePatientReport, MedicationUsageReport, FactorUsageReport,
+    TimeseriesPoint
+)
+from app.core.security import CurrentUser, get_current_admin, get_current_user, get_current_secretary_or_admin
+from app.core.config import settings
+from app.core.cache import cached_report, report_cache
+from app.utils.messages_fa import ERROR_MESSAGES
+from pydantic import BaseModel, TypeAdapter
+
+# pyarrow is optional; Parquet/Arrow exports are disabled without it
+# pyarrow اختیاری است؛ بدون آن خروجی Parquet/Arrow غیرفعال است
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
 
 router = APIRouter(prefix="/reports/advanced", tags=["گزارشات پیشرفته / Advanced Reports"])
 
+# Rows fetched per server-side cursor batch in exports / تعداد سطرهای هر دسته در خروجی‌ها
+EXPORT_BATCH_SIZE = 500
+
+# Every report route runs with a statement timeout sized for it, so a heavy report
+# cannot hold a pooled connection for minutes. Paginated and single-record reports
+# get the shortest budget, aggregates over whole tables a longer one, and streamed
+# exports the longest; on MySQL a streamed SELECT runs until its last row is sent,
+# so the export budget also bounds how long a slow client keeps the connection.
+# هر مسیر گزارش محدودیت زمان کوئری متناسب با خود را دارد؛ گزارش‌های صفحه‌بندی شده کوتاه‌ترین،
+# گزارش‌های تجمیعی طولانی‌تر و خروجی‌های جریانی طولانی‌ترین بودجه را دارند
+get_report_db = get_budgeted_db(settings.REPORT_STATEMENT_TIMEOUT_MS)
+get_aggregate_report_db = get_budgeted_db(settings.REPORT_AGGREGATE_STATEMENT_TIMEOUT_MS)
+get_export_db = get_budgeted_db(settings.REPORT_EXPORT_STATEMENT_TIMEOUT_MS)
+
+# Default range of the appointment rollup report per bucket / بازه پیش‌فرض گزارش تجمیعی نوبت‌ها برای هر بازه زمانی
+DAILY_APPOINTMENTS_DEFAULT_DAYS = {"day": 30, "month": 365, "year": 5 * 365}
+
+# Page sizes for paginated reports / اندازه صفحه برای گزارش‌های صفحه‌بندی شده
+REPORT_PAGE_SIZE = 100
+REPORT_MAX_PAGE_SIZE = 1000
+
+# Timeseries entities: (date column, id column, supported split column)
+# موجودیت‌های سری زمانی: (ستون تاریخ، ستون شناسه، ستون قابل تفکیک)
+TIMESERIES_ENTITIES = {
+    "appointments": (Appointment.appointment_date, Appointment.id, {"status": Appointment.status}),
+    "prescriptions": (Prescription.created_at, Prescription.id, {}),
+    "factors": (Factor.administration_date, Factor.id, {"factor_type": Factor.factor_type}),
+}
+
+# Export formats: media type and file extension / فرمت‌های خروجی: نوع رسانه و پسوند فایل
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+# Export formats written with pyarrow / فرمت‌های خروجی که با pyarrow نوشته می‌شوند
+COLUMNAR_EXPORT_FORMATS = {"parquet", "arrow"}
+
+# Rows per record batch (Parquet row group) in columnar exports
+# تعداد سطرهای هر دسته رکورد (گروه سطر Parquet) در خروجی‌های ستونی
+COLUMNAR_BATCH_SIZE = 10000
+
+# Low-cardinality text columns stored dictionary-encoded in columnar exports
+# ستون‌های متنی با مقادیر محدود که در خروجی ستونی به صورت دیکشنری ذخیره می‌شوند
+COLUMNAR_DICTIONARY_FIELDS = {"gender", "blood_type", "factor_type", "status", "insurance_company"}
+
+# Queries issued by the single-patient report, excluding authentication
+# تعداد کوئری‌های گزارش تک بیمار، بدون احراز هویت
+SINGLE_PATIENT_REPORT_QUERY_BUDGET = 8
+
 
 # Pydantic schemas for advanced reports
 class PatientDetailReport(BaseModel):
@@ -126,161 +204,677 @@ class AppointmentDetailReport(BaseModel):
     created_at: datetime
 
 
+class FactorReportPage(BaseModel):
+    items: List[FactorDetailReport]
+    next_cursor: Optional[str] = None
+    # Only set on the first page of a changed_since request / فقط در صفحه اول درخواست تغییرات
+    deleted_ids: Optional[List[int]] = None
+    next_watermark: Optional[datetime] = None
+
+
+class PrescriptionReportPage(BaseModel):
+    items: List[PrescriptionDetailReport]
+    next_cursor: Optional[str] = None
+
+
+class AppointmentReportPage(BaseModel):
+    items: List[AppointmentDetailReport]
+    next_cursor: Optional[str] = None
+    # Only set on the first page of a changed_since request / فقط در صفحه اول درخواست تغییرات
+    deleted_ids: Optional[List[int]] = None
+    next_watermark: Optional[datetime] = None
+
+
+def _encode_cursor(sort_value: datetime, row_id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque token / کدگذاری موقعیت صفحه به توکن"""
+    raw = json.dumps([sort_value.isoformat(), row_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode an opaque continuation token / رمزگشایی توکن ادامه"""
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES["invalid_cursor"]
+        )
+
+
+def _keyset_page(query, date_column, id_column, cursor: Optional[str], limit: int, key):
+    """
+    Fetch one page of a query ordered by (date desc, id desc)
+    دریافت یک صفحه از کوئری مرتب شده بر اساس (تاریخ نزولی، شناسه نزولی)
+    
+    `key` maps a row to its (date, id) pair; returns the page rows and the next cursor.
+    `key` هر سطر را به زوج (تاریخ، شناسه) نگاشت می‌کند؛ سطرهای صفحه و توکن بعدی برگردانده می‌شوند.
+    """
+    if cursor:
+        last_date, last_id = _decode_cursor(cursor)
+        query = query.filter(
+            (date_column < last_date) | and_(date_column == last_date, id_column < last_id)
+        )
+    
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+    
+    rows = rows[:limit]
+    return rows, _encode_cursor(*key(rows[-1]))
+
+
+def _json_list_response(model, items: list) -> Response:
+    """
+    Serialize report items once, straight to JSON
+    سریال‌سازی یکباره آیتم‌های گزارش به JSON
+    
+    A list returned as-is is dumped, re-validated against response_model and
+    serialized again by FastAPI, which costs as much CPU as building it; on a
+    threadpool worker that CPU is taken from every concurrent request.
+    لیست برگردانده شده توسط FastAPI دوباره اعتبارسنجی و سریال‌سازی می‌شود.
+    """
+    return Response(content=_list_adapter(model).dump_json(items), media_type="application/json")
+
+
+_LIST_ADAPTERS: Dict[Any, TypeAdapter] = {}
+
+
+def _list_adapter(model) -> TypeAdapter:
+    if model not in _LIST_ADAPTERS:
+        _LIST_ADAPTERS[model] = TypeAdapter(List[model])
+    return _LIST_ADAPTERS[model]
+
+
+def _fetch_within_budget(query, max_rows: Optional[int] = None) -> list:
+    """
+    Fetch all rows of an unpaginated report, or fail with 413 past max_rows
+    (REPORT_MAX_ROWS by default)
+    دریافت تمام سطرهای گزارش بدون صفحه‌بندی، یا خطای 413 در صورت عبور از سقف
+    
+    Paginated reports need no check: their page size is capped below REPORT_MAX_ROWS.
+    گزارش‌های صفحه‌بندی شده نیازی به بررسی ندارند؛ اندازه صفحه آن‌ها کمتر از سقف است.
+    """
+    if max_rows is None:
+        max_rows = settings.REPORT_MAX_ROWS
+    rows = query.limit(max_rows + 1).all()
+    if len(rows) > max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=ERROR_MESSAGES["report_too_large"]
+        )
+    return rows
+
+
+class ReportTooLargeError(Exception):
+    """A streamed report passed its row cap / عبور گزارش جریانی از سقف سطرها"""
+
+
+def _iter_within_budget(rows: Iterable, max_rows: int) -> Iterator:
+    """
+    Pass the rows of a streamed report through, failing past max_rows
+    عبور سطرهای گزارش جریانی، با خطا در صورت عبور از سقف
+    
+    A streamed response has already been started when the cap is reached, so
+    the client gets an aborted transfer instead of a silently truncated file.
+    پاسخ جریانی پیش از رسیدن به سقف شروع شده است؛ کلاینت به جای فایل ناقص، انتقال قطع شده دریافت می‌کند.
+    """
+    for count, row in enumerate(rows, 1):
+        if count > max_rows:
+            raise ReportTooLargeError(ERROR_MESSAGES["report_too_large"])
+        yield row
+
+
+def _stream_rows(query, max_rows: int) -> Iterator:
+    """
+    Stream a report query through a server-side cursor, at most max_rows rows
+    پیمایش کوئری گزارش با کرسر سمت سرور، حداکثر max_rows سطر
+    """
+    rows = query.limit(max_rows + 1).execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+    return _iter_within_budget(rows, max_rows)
+
+
+def _changed_since_condition(model, changed_since: datetime):
+    """
+    Rows created or updated at or after a watermark; >= so rows written in the
+    same second as the previous watermark are not lost
+    سطرهای ایجاد یا ویرایش شده از زمان مشخص؛ با >= تا سطرهای همان ثانیه از دست نروند
+    """
+    return or_(model.created_at >= changed_since, model.updated_at >= changed_since)
+
+
+def _delta_snapshot(db: Session, table_name: str, changed_since: datetime) -> Tuple[datetime, List[int]]:
+    """
+    Take the next watermark from the database clock before reading any rows,
+    then collect tombstones since the previous one
+    دریافت نشانه زمانی بعدی از ساعت دیتابیس پیش از خواندن سطرها، سپس شناسه‌های حذف شده
+    
+    A watermark older than REPORT_DELTA_MAX_AGE_DAYS gets 410: its tombstones
+    may have been pruned, so the client must reload the full report.
+    نشانه زمانی قدیمی‌تر از REPORT_DELTA_MAX_AGE_DAYS خطای 410 می‌گیرد و کلاینت باید گزارش کامل را دریافت کند.
+    """
+    next_watermark = db.query(func.now()).scalar()
+    if changed_since.replace(tzinfo=None) < oldest_delta_watermark(next_watermark).replace(tzinfo=None):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=ERROR_MESSAGES["delta_watermark_expired"]
+        )
+    return next_watermark, deleted_ids_since(db, table_name, changed_since)
+
+
+def _calculate_age(date_of_birth: Optional[date]) -> Optional[int]:
+    """Calculate age from date of birth / محاسبه سن از تاریخ تولد"""
+    if not date_of_birth:
+        return None
+    today = date.today()
+    return today.year - date_of_birth.year - (
+        (today.month, today.day) < (date_of_birth.month, date_of_birth.day)
+    )
+
+
+def _date_range_condition(column, start_date: Optional[date], end_date: Optional[date]):
+    """Build an optional date range condition / ساخت شرط بازه تاریخ"""
+    conditions = []
+    if start_date:
+        conditions.append(column >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        conditions.append(column <= datetime.combine(end_date, datetime.max.time()))
+    return and_(true(), *conditions)
+
+
+def _date_bucket(db: Session, column, bucket: str):
+    """
+    Truncate a datetime column to the start of its day, week (Monday), month or year
+    کوتاه کردن ستون زمان به ابتدای روز، هفته (دوشنبه)، ماه یا سال
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        if bucket == "week":
+            # Jump to the coming Sunday, then back to Monday / رفتن به یکشنبه بعد و برگشت به دوشنبه
+            return func.date(column, "weekday 0", "-6 days", type_=Date)
+        if bucket == "month":
+            return func.date(column, "start of month", type_=Date)
+        if bucket == "year":
+            return func.date(column, "start of year", type_=Date)
+        return func.date(column, type_=Date)
+    
+    # MySQL
+    if bucket == "week":
+        return func.subdate(func.date(column), func.weekday(column), type_=Date)
+    if bucket == "month":
+        return func.date_format(column, "%Y-%m-01", type_=Date)
+    if bucket == "year":
+        return func.date_format(column, "%Y-01-01", type_=Date)
+    return func.date(column, type_=Date)
+
+
+def _patients_report_query(
+    db: Session,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    has_insurance: Optional[bool],
+    min_appointments: Optional[int]
+):
+    """
+    Build the patients report as one query over per-patient aggregate subqueries
+    ساخت گزارش بیماران به صورت یک کوئری روی زیرکوئری‌های تجمیعی هر بیمار
+    
+    Counts respect the date range; totals and last dates cover the whole history.
+    شمارش‌ها بازه تاریخ را رعایت می‌کنند؛ مجموع‌ها و آخرین تاریخ‌ها کل سابقه را در بر می‌گیرند.
+    """
+    # Appointment stats / آمار نوبت‌ها
+    appointment_in_range = _date_range_condition(Appointment.appointment_date, start_date, end_date)
+    appointment_stats = db.query(
+        Appointment.patient_id.label("patient_id"),
+        func.count(case((appointment_in_range, Appointment.id))).label("total"),
+        func.count(case((
+            and_(appointment_in_range, Appointment.status == AppointmentStatus.COMPLETED),
+            Appointment.id
+        ))).label("completed"),
+        func.count(case((
+            and_(appointment_in_range, Appointment.status == AppointmentStatus.CANCELED),
+            Appointment.id
+        ))).label("canceled"),
+        func.max(Appointment.appointment_date).label("last_date")
+    ).group_by(Appointment.patient_id).subquery()
+    
+    # Prescription stats / آمار نسخه‌ها
+    prescription_in_range = _date_range_condition(Prescription.created_at, start_date, end_date)
+    prescription_stats = db.query(
+        Prescription.patient_id.label("patient_id"),
+        func.count(case((prescription_in_range, Prescription.id))).label("total"),
+        func.max(Prescription.created_at).label("last_date")
+    ).group_by(Prescription.patient_id).subquery()
+    
+    medication_stats = db.query(
+        Prescription.patient_id.label("patient_id"),
+        func.count(PrescriptionItem.id).label("total")
+    ).join(PrescriptionItem, PrescriptionItem.prescription_id == Prescription.id).group_by(
+        Prescription.patient_id
+    ).subquery()
+    
+    # Factor stats / آمار فاکتورها
+    factor_in_range = _date_range_condition(Factor.administration_date, start_date, end_date)
+    factor_stats = db.query(
+        Factor.patient_id.label("patient_id"),
+        func.count(case((factor_in_range, Factor.id))).label("total"),
+        func.sum(Factor.units_administered).label("units"),
+        func.sum(Factor.cost).label("cost"),
+        func.max(Factor.administration_date).label("last_date")
+    ).group_by(Factor.patient_id).subquery()
+    
+    total_appointments = func.coalesce(appointment_stats.c.total, 0)
+    
+    query = db.query(
+        Patient.id.label("patient_id"),
+        User.full_name,
+        User.phone_number,
+        Patient.national_code,
+        Patient.gender,
+        Patient.blood_type,
+        Patient.date_of_birth,
+        total_appointments.label("total_appointments"),
+        func.coalesce(appointment_stats.c.completed, 0).label("completed_appointments"),
+        func.coalesce(appointment_stats.c.canceled, 0).label("canceled_appointments"),
+        func.coalesce(prescription_stats.c.total, 0).label("total_prescriptions"),
+        func.coalesce(medication_stats.c.total, 0).label("total_medications"),
+        func.coalesce(factor_stats.c.total, 0).label("total_factors"),
+        func.coalesce(factor_stats.c.units, 0).label("total_factor_units"),
+        func.coalesce(factor_stats.c.cost, 0.0).label("total_factor_cost"),
+        Insurance.id.label("insurance_id"),
+        Insurance.insurance_company,
+        appointment_stats.c.last_date.label("last_appointment_date"),
+        prescription_stats.c.last_date.label("last_prescription_date"),
+        factor_stats.c.last_date.label("last_factor_date")
+    ).join(
+        User, Patient.user_id == User.id
+    ).outerjoin(
+        Insurance, Insurance.patient_id == Patient.id
+    ).outerjoin(
+        appointment_stats, appointment_stats.c.patient_id == Patient.id
+    ).outerjoin(
+        prescription_stats, prescription_stats.c.patient_id == Patient.id
+    ).outerjoin(
+        medication_stats, medication_stats.c.patient_id == Patient.id
+    ).outerjoin(
+        factor_stats, factor_stats.c.patient_id == Patient.id
+    )
+    
+    if has_insurance is not None:
+        query = query.filter(Insurance.id.isnot(None) if has_insurance else Insurance.id.is_(None))
+    
+    if min_appointments:
+        query = query.filter(total_appointments >= min_appointments)
+    
+    return query.order_by(Patient.id)
+
+
+def _patient_report_row(row) -> PatientDetailReport:
+    """Convert an aggregated row to a report item / تبدیل سطر تجمیعی به آیتم گزارش"""
+    return PatientDetailReport(
+        patient_id=row.patient_id,
+        full_name=row.full_name,
+        phone_number=row.phone_number,
+        national_code=row.national_code,
+        gender=row.gender.value if row.gender else None,
+        blood_type=row.blood_type.value if row.blood_type else None,
+        age=_calculate_age(row.date_of_birth),
+        total_appointments=row.total_appointments,
+        completed_appointments=row.completed_appointments,
+        canceled_appointments=row.canceled_appointments,
+        total_prescriptions=row.total_prescriptions,
+        total_medications=row.total_medications,
+        total_factors=row.total_factors,
+        total_factor_units=int(row.total_factor_units),
+        total_factor_cost=float(row.total_factor_cost),
+        has_insurance=row.insurance_id is not None,
+        insurance_company=row.insurance_company,
+        last_appointment_date=row.last_appointment_date,
+        last_prescription_date=row.last_prescription_date,
+        last_factor_date=row.last_factor_date
+    )
+
+
+def _stream_csv(fieldnames: List[str], rows):
+    """
+    Render rows as CSV chunks, one chunk per export batch
+    تولید CSV به صورت تکه‌ای، یک تکه برای هر دسته خروجی
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    
+    for index, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if index % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    yield buffer.getvalue()
+
+
+def _gzip_stream(chunks):
+    """Compress text chunks into a gzip byte stream / فشرده‌سازی تکه‌ها به جریان gzip"""
+    # wbits=31 writes a gzip header and trailer / wbits=31 هدر و انتهای gzip را می‌نویسد
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkSink:
+    """Write-only file object drained after every record batch / فایل فقط‌نوشتنی که پس از هر دسته تخلیه می‌شود"""
+
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _arrow_schema(model: typing.Type[BaseModel]):
+    """Build a typed Arrow schema from a report model / ساخت ساختار Arrow از مدل گزارش"""
+    arrow_types = {
+        int: pa.int64(),
+        float: pa.float64(),
+        str: pa.string(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+    }
+    
+    fields = []
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        args = typing.get_args(annotation)
+        nullable = type(None) in args
+        if nullable:
+            annotation = next(arg for arg in args if arg is not type(None))
+        
+        if name in COLUMNAR_DICTIONARY_FIELDS:
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        else:
+            arrow_type = arrow_types[annotation]
+        fields.append(pa.field(name, arrow_type, nullable=nullable))
+    
+    return pa.schema(fields)
+
+
+def _stream_columnar(model: typing.Type[BaseModel], rows, export_format: str):
+    """
+    Write rows as Parquet or Arrow IPC record batches, one chunk per batch
+    نوشتن سطرها به صورت دسته‌های Parquet یا Arrow، یک تکه برای هر دسته
+    """
+    schema = _arrow_schema(model)
+    sink = _ChunkSink()
+    output = pa.PythonFile(sink, mode="w")
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(output, schema)
+    
+    while True:
+        batch = list(itertools.islice(rows, COLUMNAR_BATCH_SIZE))
+        if not batch:
+            break
+        writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+        yield sink.drain()
+    
+    writer.close()
+    yield sink.drain()
+
+
+# Fixed parts of the XLSX package; only the worksheet is generated per export
+# بخش‌های ثابت بسته XLSX؛ فقط برگه کاری برای هر خروجی تولید می‌شود
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Report" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '<Relationship Id="rId2" Target="styles.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"/>'
+        '</Relationships>'
+    ),
+    # Style 1 = date and time, style 2 = date; the "Normal" cell style is the
+    # workbook default that readers (Excel, openpyxl) expect to find
+    # سبک 1 = تاریخ و زمان، سبک 2 = تاریخ؛ سبک «Normal» پیش‌فرض مورد انتظار خواننده‌ها است
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="1"><numFmt numFmtId="164" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="3">'
+        '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '</cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+# Characters that are not allowed in XML 1.0 / نویسه‌های غیرمجاز در XML
+XML_ILLEGAL_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def _xlsx_column(index: int) -> str:
+    """Convert a zero-based column index to letters (0 -> A) / تبدیل شماره ستون به حروف"""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_cell(reference: str, value) -> str:
+    """Render one worksheet cell / تولید یک خانه برگه کاری"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f'<c r="{reference}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f'<c r="{reference}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        serial = (value - EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{reference}" s="1"><v>{serial}</v></c>'
+    if isinstance(value, date):
+        serial = (value - EXCEL_EPOCH.date()).days
+        return f'<c r="{reference}" s="2"><v>{serial}</v></c>'
+    
+    text = xml_escape(XML_ILLEGAL_CHARS.sub("", str(value)))
+    return f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _stream_xlsx(fieldnames: List[str], rows):
+    """
+    Write rows as an XLSX workbook, one zip chunk per export batch
+    نوشتن سطرها به صورت فایل XLSX، یک تکه فشرده برای هر دسته خروجی
+    
+    Cells use inline strings so nothing has to be kept for a shared string
+    table, and the zip is written with data descriptors, so memory use does
+    not grow with the number of rows.
+    خانه‌ها از رشته درون‌خطی استفاده می‌کنند و فایل zip بدون بازگشت به عقب
+    نوشته می‌شود، بنابراین مصرف حافظه با تعداد سطرها افزایش نمی‌یابد.
+    """
+    sink = _ChunkSink()
+    columns = [_xlsx_column(index) for index in range(len(fieldnames))]
+    
+    # _ChunkSink has no seek(), so zipfile streams entries with data descriptors
+    # _ChunkSink متد seek ندارد، پس zipfile ورودی‌ها را به صورت جریانی می‌نویسد
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                b'<sheetViews><sheetView workbookViewId="0" rightToLeft="1"/></sheetViews>'
+                b'<sheetData>'
+            )
+            header = "".join(_xlsx_cell(f"{column}1", name) for column, name in zip(columns, fieldnames))
+            sheet.write(f'<row r="1">{header}</row>'.encode("utf-8"))
+            
+            for row_number, row in enumerate(rows, start=2):
+                cells = "".join(
+                    _xlsx_cell(f"{column}{row_number}", row[name])
+                    for column, name in zip(columns, fieldnames)
+                )
+                sheet.write(f'<row r="{row_number}">{cells}</row>'.encode("utf-8"))
+                if row_number % EXPORT_BATCH_SIZE == 0:
+                    yield sink.drain()
+            
+            sheet.write(b'</sheetData></worksheet>')
+    
+    yield sink.drain()
+
+
+def _check_export_format(export_format: str) -> None:
+    """Reject columnar formats when pyarrow is missing / رد فرمت ستونی در نبود pyarrow"""
+    if export_format in COLUMNAR_EXPORT_FORMATS and pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=ERROR_MESSAGES["columnar_export_unavailable"]
+        )
+
+
+def _export_response(model: typing.Type[BaseModel], rows, export_format: str,
+                     filename: str, compress: bool = False) -> StreamingResponse:
+    """
+    Stream report rows (dicts) in the requested export format
+    ارسال جریانی سطرهای گزارش در فرمت خروجی درخواستی
+    """
+    # Peek at the first row so an empty export still returns 404
+    # بررسی اولین سطر تا خروجی خالی همچنان 404 برگرداند
+    first_row = next(rows, None)
+    if first_row is None:
+        raise HTTPException(status_code=404, detail="داده‌ای برای خروجی یافت نشد")
+    
+    rows = itertools.chain([first_row], rows)
+    media_type, extension = EXPORT_FORMATS[export_format]
+    headers = {"Content-Disposition": f"attachment; filename={filename}.{extension}"}
+    
+    if export_format == "csv":
+        content = _stream_csv(list(model.model_fields), rows)
+        if compress:
+            content = _gzip_stream(content)
+            headers["Content-Encoding"] = "gzip"
+    elif export_format == "xlsx":
+        content = _stream_xlsx(list(model.model_fields), rows)
+    else:
+        # Parquet and Arrow are already compressed / Parquet و Arrow خودشان فشرده هستند
+        content = _stream_columnar(model, rows, export_format)
+    
+    return StreamingResponse(content, media_type=media_type, headers=headers)
+
+
 @router.get("/patients", response_model=List[PatientDetailReport], 
             summary="گزارش تفصیلی بیماران")
-async def get_detailed_patients_report(
+@cached_report("patients", "users", "insurances", "appointments", "prescriptions", "prescription_items", "factors")
+def get_detailed_patients_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     has_insurance: Optional[bool] = None,
     min_appointments: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    db: Session = Depends(get_aggregate_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Get detailed report of all patients with their activities (Admin only)
     گزارش تفصیلی تمام بیماران با فعالیت‌هایشان (فقط مدیر)
     """
-    # Build base query
-    patients = db.query(Patient).join(User).all()
-    
-    results = []
-    for patient in patients:
-        # Calculate age
-        age = None
-        if patient.date_of_birth:
-            today = date.today()
-            age = today.year - patient.date_of_birth.year - (
-                (today.month, today.day) < (patient.date_of_birth.month, patient.date_of_birth.day)
-            )
-        
-        # Get appointment stats
-        appointments_query = db.query(Appointment).filter(Appointment.patient_id == patient.id)
-        if start_date:
-            appointments_query = appointments_query.filter(
-                Appointment.appointment_date >= datetime.combine(start_date, datetime.min.time())
-            )
-        if end_date:
-            appointments_query = appointments_query.filter(
-                Appointment.appointment_date <= datetime.combine(end_date, datetime.max.time())
-            )
-        
-        total_appointments = appointments_query.count()
-        completed = appointments_query.filter(Appointment.status == AppointmentStatus.COMPLETED).count()
-        canceled = appointments_query.filter(Appointment.status == AppointmentStatus.CANCELED).count()
-        
-        # Skip if min_appointments filter doesn't match
-        if min_appointments and total_appointments < min_appointments:
-            continue
-        
-        # Get prescription stats
-        prescriptions = db.query(Prescription).filter(Prescription.patient_id == patient.id)
-        if start_date:
-            prescriptions = prescriptions.filter(
-                Prescription.created_at >= datetime.combine(start_date, datetime.min.time())
-            )
-        if end_date:
-            prescriptions = prescriptions.filter(
-                Prescription.created_at <= datetime.combine(end_date, datetime.max.time())
-            )
-        
-        total_prescriptions = prescriptions.count()
-        total_medications = db.query(func.count(PrescriptionItem.id)).join(
-            Prescription
-        ).filter(Prescription.patient_id == patient.id).scalar() or 0
-        
-        # Get factor stats
-        factors_query = db.query(Factor).filter(Factor.patient_id == patient.id)
-        if start_date:
-            factors_query = factors_query.filter(
-                Factor.administration_date >= datetime.combine(start_date, datetime.min.time())
-            )
-        if end_date:
-            factors_query = factors_query.filter(
-                Factor.administration_date <= datetime.combine(end_date, datetime.max.time())
-            )
-        
-        total_factors = factors_query.count()
-        total_units = db.query(func.sum(Factor.units_administered)).filter(
-            Factor.patient_id == patient.id
-        ).scalar() or 0
-        total_cost = db.query(func.sum(Factor.cost)).filter(
-            Factor.patient_id == patient.id
-        ).scalar() or 0.0
-        
-        # Get insurance info
-        insurance = db.query(Insurance).filter(Insurance.patient_id == patient.id).first()
-        has_ins = insurance is not None
-        
-        # Skip if insurance filter doesn't match
-        if has_insurance is not None and has_ins != has_insurance:
-            continue
-        
-        # Get last dates
-        last_appointment = db.query(Appointment.appointment_date).filter(
-            Appointment.patient_id == patient.id
-        ).order_by(desc(Appointment.appointment_date)).first()
-        
-        last_prescription = db.query(Prescription.created_at).filter(
-            Prescription.patient_id == patient.id
-        ).order_by(desc(Prescription.created_at)).first()
-        
-        last_factor = db.query(Factor.administration_date).filter(
-            Factor.patient_id == patient.id
-        ).order_by(desc(Factor.administration_date)).first()
-        
-        results.append(PatientDetailReport(
-            patient_id=patient.id,
-            full_name=patient.user.full_name,
-            phone_number=patient.user.phone_number,
-            national_code=patient.national_code,
-            gender=patient.gender.value if patient.gender else None,
-            blood_type=patient.blood_type.value if patient.blood_type else None,
-            age=age,
-            total_appointments=total_appointments,
-            completed_appointments=completed,
-            canceled_appointments=canceled,
-            total_prescriptions=total_prescriptions,
-            total_medications=total_medications,
-            total_factors=total_factors,
-            total_factor_units=int(total_units),
-            total_factor_cost=float(total_cost),
-            has_insurance=has_ins,
-            insurance_company=insurance.insurance_company if insurance else None,
-            last_appointment_date=last_appointment[0] if last_appointment else None,
-            last_prescription_date=last_prescription[0] if last_prescription else None,
-            last_factor_date=last_factor[0] if last_factor else None
-        ))
-    
-    return results
-
-
-@router.get("/factors", response_model=List[FactorDetailReport],
-            summary="گزارش تفصیلی فاکتورها")
-async def get_detailed_factors_report(
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    factor_type: Optional[str] = None,
-    patient_id: Optional[int] = None,
-    min_units: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    query = _patients_report_query(db, start_date, end_date, has_insurance, min_appointments)
+    return _json_list_response(PatientDetailReport, [_patient_report_row(row) for row in _fetch_within_budget(query)])
+
+
+def _factors_report_query(
+    db: Session,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    factor_type: Optional[str],
+    patient_id: Optional[int],
+    min_units: Optional[int]
 ):
     """
-    Get detailed report of all factor administrations (Admin only)
-    گزارش تفصیلی تمام تزریقات فاکتور (فقط مدیر)
+    Build the factors report as plain joined columns, without ORM objects
+    ساخت گزارش فاکتورها به صورت ستون‌های ساده، بدون اشیای ORM
     """
-    # Set default dates
-    if not end_date:
-        end_date = date.today()
-    if not start_date:
-        start_date = end_date - timedelta(days=180)  # Last 6 months
-    
-    # Build query
-    query = db.query(Factor).join(Patient).join(User).filter(
-        and_(
-            Factor.administration_date >= datetime.combine(start_date, datetime.min.time()),
-            Factor.administration_date <= datetime.combine(end_date, datetime.max.time())
-        )
+    query = db.query(
+        Factor.id.label("factor_id"),
+        Factor.patient_id,
+        User.full_name.label("patient_name"),
+        User.phone_number.label("patient_phone"),
+        Factor.factor_type,
+        Factor.units_administered,
+        Factor.administration_date,
+        Factor.lot_number,
+        Factor.administered_by,
+        Factor.cost,
+        Factor.notes
+    ).join(
+        Patient, Factor.patient_id == Patient.id
+    ).join(
+        User, Patient.user_id == User.id
+    ).filter(
+        _date_range_condition(Factor.administration_date, start_date, end_date)
     )
     
     if factor_type:
@@ -292,33 +886,74 @@ async def get_detailed_factors_report(
     if min_units:
         query = query.filter(Factor.units_administered >= min_units)
     
-    factors = query.order_by(desc(Factor.administration_date)).all()
+    return query.order_by(desc(Factor.administration_date), desc(Factor.id))
+
+
+@router.get("/factors", response_model=FactorReportPage,
+            summary="گزارش تفصیلی فاکتورها")
+@cached_report("factors", "patients", "users")
+def get_detailed_factors_report(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    factor_type: Optional[str] = None,
+    patient_id: Optional[int] = None,
+    min_units: Optional[int] = None,
+    changed_since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_MAX_PAGE_SIZE),
+    db: Session = Depends(get_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Get detailed report of all factor administrations (Admin only)
+    گزارش تفصیلی تمام تزریقات فاکتور (فقط مدیر)
+    
+    Results are paginated; pass next_cursor back as cursor to get the next page
+    نتایج صفحه‌بندی شده‌اند؛ برای صفحه بعد مقدار next_cursor را به عنوان cursor ارسال کنید
     
-    results = []
-    for factor in factors:
-        results.append(FactorDetailReport(
-            factor_id=factor.id,
-            patient_id=factor.patient_id,
-            patient_name=factor.patient.user.full_name,
-            patient_phone=factor.patient.user.phone_number,
-            factor_type=factor.factor_type,
-            units_administered=factor.units_administered,
-            administration_date=factor.administration_date,
-            lot_number=factor.lot_number,
-            administered_by=factor.administered_by,
-            cost=factor.cost,
-            notes=factor.notes
-        ))
+    With changed_since, only rows created or updated since then are returned (no
+    default date range); the first page also lists deleted_ids and the
+    next_watermark to send on the following sync. changed_since may be at most
+    REPORT_DELTA_MAX_AGE_DAYS old; older values get 410 and need a full reload
+    با changed_since فقط سطرهای تغییر یافته برگردانده می‌شوند؛ صفحه اول شامل
+    شناسه‌های حذف شده و نشانه زمانی همگام‌سازی بعدی است. changed_since قدیمی‌تر از
+    REPORT_DELTA_MAX_AGE_DAYS خطای 410 برمی‌گرداند و گزارش کامل باید دوباره دریافت شود
+    """
+    deleted_ids = None
+    next_watermark = None
     
-    return results
+    if changed_since is None:
+        # Set default dates
+        if not end_date:
+            end_date = date.today()
+        if not start_date:
+            start_date = end_date - timedelta(days=180)  # Last 6 months
+    elif cursor is None:
+        next_watermark, deleted_ids = _delta_snapshot(db, "factors", changed_since)
+    
+    query = _factors_report_query(db, start_date, end_date, factor_type, patient_id, min_units)
+    if changed_since is not None:
+        query = query.filter(_changed_since_condition(Factor, changed_since))
+    
+    rows, next_cursor = _keyset_page(
+        query, Factor.administration_date, Factor.id, cursor, limit,
+        key=lambda row: (row.administration_date, row.factor_id)
+    )
+    
+    return FactorReportPage(
+        items=[FactorDetailReport(**row._asdict()) for row in rows],
+        next_cursor=next_cursor,
+        deleted_ids=deleted_ids,
+        next_watermark=next_watermark
+    )
 
 
 @router.get("/patient/{patient_id}", response_model=SinglePatientReport,
             summary="گزارش کامل یک بیمار")
-async def get_single_patient_report(
+def get_single_patient_report(
     patient_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: Session = Depends(get_report_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get comprehensive report for a single patient
@@ -326,9 +961,15 @@ async def get_single_patient_report(
     
     Patients can only access their own report, admins can access any
     بیماران فقط می‌توانند گزارش خود را ببینند، ادمین‌ها می‌توانند هر گزارشی را ببینند
+    
+    Issues at most SINGLE_PATIENT_REPORT_QUERY_BUDGET queries
+    حداکثر به تعداد SINGLE_PATIENT_REPORT_QUERY_BUDGET کوئری اجرا می‌کند
     """
-    # Get patient
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    # Get patient with user and insurance
+    patient = db.query(Patient).options(
+        joinedload(Patient.user),
+        joinedload(Patient.insurance)
+    ).filter(Patient.id == patient_id).first()
     if not patient:
         raise HTTPException(status_code=404, detail="بیمار یافت نشد")
     
@@ -337,23 +978,22 @@ async def get_single_patient_report(
         raise HTTPException(status_code=403, detail="شما مجاز به مشاهده این گزارش نیستید")
     
     # Calculate age
-    age = None
-    if patient.date_of_birth:
-        today = date.today()
-        age = today.year - patient.date_of_birth.year - (
-            (today.month, today.day) < (patient.date_of_birth.month, patient.date_of_birth.day)
-        )
+    age = _calculate_age(patient.date_of_birth)
     
     # Get insurance info
-    insurance = db.query(Insurance).filter(Insurance.patient_id == patient.id).first()
+    insurance = patient.insurance
+    
+    # Get appointment stats with conditional aggregation
+    def status_count(appointment_status: AppointmentStatus):
+        return func.count(case((Appointment.status == appointment_status, Appointment.id)))
     
-    # Get appointment stats
-    appointments = db.query(Appointment).filter(Appointment.patient_id == patient.id)
-    total_appts = appointments.count()
-    pending = appointments.filter(Appointment.status == AppointmentStatus.PENDING).count()
-    confirmed = appointments.filter(Appointment.status == AppointmentStatus.CONFIRMED).count()
-    completed = appointments.filter(Appointment.status == AppointmentStatus.COMPLETED).count()
-    canceled = appointments.filter(Appointment.status == AppointmentStatus.CANCELED).count()
+    appointment_stats = db.query(
+        func.count(Appointment.id).label("total"),
+        status_count(AppointmentStatus.PENDING).label("pending"),
+        status_count(AppointmentStatus.CONFIRMED).label("confirmed"),
+        status_count(AppointmentStatus.COMPLETED).label("completed"),
+        status_count(AppointmentStatus.CANCELED).label("canceled")
+    ).filter(Appointment.patient_id == patient.id).one()
     
     # Get upcoming appointments
     upcoming = db.query(Appointment).filter(
@@ -375,20 +1015,23 @@ async def get_single_patient_report(
     ]
     
     # Get prescription stats
-    prescriptions = db.query(Prescription).filter(Prescription.patient_id == patient.id)
-    total_prescriptions = prescriptions.count()
+    prescription_stats = db.query(
+        func.count(func.distinct(Prescription.id)).label("total"),
+        func.count(func.distinct(PrescriptionItem.medication_id)).label("unique_medications")
+    ).outerjoin(
+        PrescriptionItem, PrescriptionItem.prescription_id == Prescription.id
+    ).filter(Prescription.patient_id == patient.id).one()
     
-    unique_meds = db.query(func.count(func.distinct(PrescriptionItem.medication_id))).join(
-        Prescription
-    ).filter(Prescription.patient_id == patient.id).scalar() or 0
+    # Get recent prescriptions with items and medications in one batch
+    recent_presc = db.query(Prescription).options(
+        selectinload(Prescription.items).joinedload(PrescriptionItem.medication)
+    ).filter(
+        Prescription.patient_id == patient.id
+    ).order_by(desc(Prescription.created_at)).limit(5).all()
     
-    # Get recent prescriptions
-    recent_presc = prescriptions.order_by(desc(Prescription.created_at)).limit(5).all()
     recent_presc_list = []
     for presc in recent_presc:
-        items = db.query(PrescriptionItem).filter(
-            PrescriptionItem.prescription_id == presc.id
-        ).join(Medication).all()
+        items = sorted(presc.items, key=lambda item: item.id)
         
         recent_presc_list.append({
             "prescription_id": presc.id,
@@ -407,17 +1050,16 @@ async def get_single_patient_report(
         })
     
     # Get factor stats
-    factors = db.query(Factor).filter(Factor.patient_id == patient.id)
-    total_factors = factors.count()
-    total_units = db.query(func.sum(Factor.units_administered)).filter(
-        Factor.patient_id == patient.id
-    ).scalar() or 0
-    total_cost = db.query(func.sum(Factor.cost)).filter(
-        Factor.patient_id == patient.id
-    ).scalar() or 0.0
+    factor_stats = db.query(
+        func.count(Factor.id).label("total"),
+        func.coalesce(func.sum(Factor.units_administered), 0).label("units"),
+        func.coalesce(func.sum(Factor.cost), 0.0).label("cost")
+    ).filter(Factor.patient_id == patient.id).one()
     
     # Get recent factors
-    recent_factors = factors.order_by(desc(Factor.administration_date)).limit(5).all()
+    recent_factors = db.query(Factor).filter(
+        Factor.patient_id == patient.id
+    ).order_by(desc(Factor.administration_date)).limit(5).all()
     recent_factors_list = [
         {
             "factor_id": f.id,
@@ -446,35 +1088,108 @@ async def get_single_patient_report(
         insurance_company=insurance.insurance_company if insurance else None,
         policy_number=insurance.policy_number if insurance else None,
         coverage_type=insurance.coverage_type if insurance else None,
-        total_appointments=total_appts,
-        pending_appointments=pending,
-        confirmed_appointments=confirmed,
-        completed_appointments=completed,
-        canceled_appointments=canceled,
+        total_appointments=appointment_stats.total,
+        pending_appointments=appointment_stats.pending,
+        confirmed_appointments=appointment_stats.confirmed,
+        completed_appointments=appointment_stats.completed,
+        canceled_appointments=appointment_stats.canceled,
         upcoming_appointments=upcoming_list,
-        total_prescriptions=total_prescriptions,
-        unique_medications=unique_meds,
+        total_prescriptions=prescription_stats.total,
+        unique_medications=prescription_stats.unique_medications,
         recent_prescriptions=recent_presc_list,
-        total_factor_administrations=total_factors,
-        total_factor_units=int(total_units),
-        total_factor_cost=float(total_cost),
+        total_factor_administrations=factor_stats.total,
+        total_factor_units=int(factor_stats.units),
+        total_factor_cost=float(factor_stats.cost),
         recent_factors=recent_factors_list
     )
 
 
-@router.get("/prescriptions", response_model=List[PrescriptionDetailReport],
+def _prescriptions_report_query(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    patient_id: Optional[int],
+    medication_name: Optional[str]
+):
+    """
+    Build the prescriptions report query with patient, user, items and medications loaded
+    ساخت کوئری گزارش نسخه‌ها همراه با بیمار، کاربر، آیتم‌ها و داروها
+    """
+    # Patient and user come from the join, items from one batched load
+    query = db.query(Prescription).join(Prescription.patient).join(Patient.user).options(
+        contains_eager(Prescription.patient).contains_eager(Patient.user),
+        selectinload(Prescription.items).joinedload(PrescriptionItem.medication)
+    ).filter(
+        and_(
+            Prescription.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Prescription.created_at <= datetime.combine(end_date, datetime.max.time())
+        )
+    )
+    
+    if patient_id:
+        query = query.filter(Prescription.patient_id == patient_id)
+    
+    if medication_name:
+        query = query.filter(
+            db.query(PrescriptionItem.id).join(
+                Medication, PrescriptionItem.medication_id == Medication.id
+            ).filter(
+                PrescriptionItem.prescription_id == Prescription.id,
+                Medication.name.ilike(f"%{medication_name}%")
+            ).exists()
+        )
+    
+    return query.order_by(desc(Prescription.created_at), desc(Prescription.id))
+
+
+def _prescription_report_item(presc: Prescription, medication_name: Optional[str]) -> PrescriptionDetailReport:
+    """Convert a loaded prescription to a report item / تبدیل نسخه بارگذاری شده به آیتم گزارش"""
+    items = sorted(presc.items, key=lambda item: item.id)
+    
+    # Only list the matching medications when filtering by name
+    if medication_name:
+        items = [item for item in items if medication_name.lower() in item.medication.name.lower()]
+    
+    medications_list = [
+        {
+            "medication_name": item.medication.name,
+            "dosage": item.dosage,
+            "duration": item.duration,
+            "quantity": item.quantity,
+            "instructions": item.instructions
+        }
+        for item in items
+    ]
+    
+    return PrescriptionDetailReport(
+        prescription_id=presc.id,
+        patient_id=presc.patient_id,
+        patient_name=presc.patient.user.full_name,
+        patient_phone=presc.patient.user.phone_number,
+        doctor_name=presc.doctor_name,
+        diagnosis=presc.diagnosis,
+        created_at=presc.created_at,
+        total_medications=len(medications_list),
+        medications=medications_list
+    )
+
+
+@router.get("/prescriptions", response_model=PrescriptionReportPage,
             summary="گزارش تفصیلی نسخه‌ها")
-async def get_detailed_prescriptions_report(
+@cached_report("prescriptions", "prescription_items", "medications", "patients", "users")
+def get_detailed_prescriptions_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     patient_id: Optional[int] = None,
     medication_name: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    cursor: Optional[str] = None,
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_MAX_PAGE_SIZE),
+    db: Session = Depends(get_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
-    Get detailed report of all prescriptions (Admin only)
-    گزارش تفصیلی تمام نسخه‌ها (فقط مدیر)
+    Get detailed report of all prescriptions (Admin only, paginated)
+    گزارش تفصیلی تمام نسخه‌ها (فقط مدیر، صفحه‌بندی شده)
     """
     # Set default dates
     if not end_date:
@@ -482,71 +1197,237 @@ async def get_detailed_prescriptions_report(
     if not start_date:
         start_date = end_date - timedelta(days=90)
     
-    # Build query
-    query = db.query(Prescription).join(Patient).join(User).filter(
-        and_(
-            Prescription.created_at >= datetime.combine(start_date, datetime.min.time()),
-            Prescription.created_at <= datetime.combine(end_date, datetime.max.time())
-        )
+    query = _prescriptions_report_query(db, start_date, end_date, patient_id, medication_name)
+    prescriptions, next_cursor = _keyset_page(
+        query, Prescription.created_at, Prescription.id, cursor, limit,
+        key=lambda presc: (presc.created_at, presc.id)
     )
     
-    if patient_id:
-        query = query.filter(Prescription.patient_id == patient_id)
+    return PrescriptionReportPage(
+        items=[_prescription_report_item(presc, medication_name) for presc in prescriptions],
+        next_cursor=next_cursor
+    )
+
+
+def _appointments_report_query(
+    db: Session,
+    start_date: Optional[date],
+    end_date: Optional[date],
+    appointment_status: Optional[AppointmentStatus],
+    patient_id: Optional[int]
+):
+    """
+    Build the appointments report as plain joined columns, without ORM objects
+    ساخت گزارش نوبت‌ها به صورت ستون‌های ساده، بدون اشیای ORM
+    """
+    query = db.query(
+        Appointment.id.label("appointment_id"),
+        Appointment.patient_id,
+        User.full_name.label("patient_name"),
+        User.phone_number.label("patient_phone"),
+        Appointment.appointment_date,
+        Appointment.status,
+        Appointment.reason,
+        Appointment.notes,
+        Appointment.created_at
+    ).join(
+        Patient, Appointment.patient_id == Patient.id
+    ).join(
+        User, Patient.user_id == User.id
+    ).filter(
+        _date_range_condition(Appointment.appointment_date, start_date, end_date)
+    )
     
-    prescriptions = query.order_by(desc(Prescription.created_at)).all()
+    if appointment_status:
+        query = query.filter(Appointment.status == appointment_status)
     
-    results = []
-    for presc in prescriptions:
-        # Get prescription items
-        items = db.query(PrescriptionItem).filter(
-            PrescriptionItem.prescription_id == presc.id
-        ).join(Medication).all()
-        
-        # Filter by medication name if provided
-        if medication_name:
-            items = [item for item in items if medication_name.lower() in item.medication.name.lower()]
-            if not items:
-                continue
-        
-        medications_list = [
-            {
-                "medication_name": item.medication.name,
-                "dosage": item.dosage,
-                "duration": item.duration,
-                "quantity": item.quantity,
-                "instructions": item.instructions
-            }
-            for item in items
-        ]
-        
-        results.append(PrescriptionDetailReport(
-            prescription_id=presc.id,
-            patient_id=presc.patient_id,
-            patient_name=presc.patient.user.full_name,
-            patient_phone=presc.patient.user.phone_number,
-            doctor_name=presc.doctor_name,
-            diagnosis=presc.diagnosis,
-            created_at=presc.created_at,
-            total_medications=len(medications_list),
-            medications=medications_list
-        ))
-    
-    return results
-
-
-@router.get("/appointments", response_model=List[AppointmentDetailReport],
+    if patient_id:
+        query = query.filter(Appointment.patient_id == patient_id)
+    
+    return query.order_by(desc(Appointment.appointment_date), desc(Appointment.id))
+
+
+def _appointment_report_item(row) -> AppointmentDetailReport:
+    """Convert an appointment row to a report item / تبدیل سطر نوبت به آیتم گزارش"""
+    return AppointmentDetailReport(**{**row._asdict(), "status": row.status.value})
+
+
+@router.get("/appointments", response_model=AppointmentReportPage,
             summary="گزارش تفصیلی نوبت‌ها")
-async def get_detailed_appointments_report(
+@cached_report("appointments", "patients", "users")
+def get_detailed_appointments_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     status: Optional[AppointmentStatus] = None,
     patient_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    changed_since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_MAX_PAGE_SIZE),
+    db: Session = Depends(get_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Get detailed report of all appointments (Admin only, paginated)
+    گزارش تفصیلی تمام نوبت‌ها (فقط مدیر، صفحه‌بندی شده)
+    
+    changed_since works as in the factors report / changed_since مانند گزارش فاکتورها عمل می‌کند
+    """
+    deleted_ids = None
+    next_watermark = None
+    
+    if changed_since is None:
+        # Set default dates
+        if not end_date:
+            end_date = date.today()
+        if not start_date:
+            start_date = end_date - timedelta(days=30)
+    elif cursor is None:
+        next_watermark, deleted_ids = _delta_snapshot(db, "appointments", changed_since)
+    
+    query = _appointments_report_query(db, start_date, end_date, status, patient_id)
+    if changed_since is not None:
+        query = query.filter(_changed_since_condition(Appointment, changed_since))
+    
+    rows, next_cursor = _keyset_page(
+        query, Appointment.appointment_date, Appointment.id, cursor, limit,
+        key=lambda row: (row.appointment_date, row.appointment_id)
+    )
+    
+    return AppointmentReportPage(
+        items=[_appointment_report_item(row) for row in rows],
+        next_cursor=next_cursor,
+        deleted_ids=deleted_ids,
+        next_watermark=next_watermark
+    )
+
+
+@router.get("/daily-appointments", response_model=List[DailyAppointmentReport],
+            summary="گزارش روزانه نوبت‌ها")
+@cached_report("appointments", "patients", "users", "daily_appointment_rollups")
+def get_daily_appointments_report(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    bucket: str = Query("day", pattern="^(day|month|year)$"),
+    db: Session = Depends(get_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Get appointment counts by status per day, month or year from the rollup table (Admin only)
+    دریافت تعداد نوبت‌ها بر اساس وضعیت در هر روز، ماه یا سال از جدول تجمیعی (فقط مدیر)
+    
+    Month and year rows sum the daily rollup rows inside the date range and are
+    dated on the first day of their period. The default range is the last 30 days,
+    12 months or 5 years.
+    ردیف‌های ماه و سال مجموع ردیف‌های روزانه داخل بازه هستند و تاریخ آن‌ها روز اول دوره است.
+    """
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=DAILY_APPOINTMENTS_DEFAULT_DAYS[bucket])
+    
+    bucket_start = _date_bucket(db, DailyAppointmentRollup.date, bucket).label("bucket_start")
+    rows = _fetch_within_budget(db.query(
+        bucket_start,
+        func.sum(DailyAppointmentRollup.pending).label("pending"),
+        func.sum(DailyAppointmentRollup.confirmed).label("confirmed"),
+        func.sum(DailyAppointmentRollup.completed).label("completed"),
+        func.sum(DailyAppointmentRollup.canceled).label("canceled")
+    ).filter(
+        and_(
+            DailyAppointmentRollup.date >= start_date,
+            DailyAppointmentRollup.date <= end_date
+        )
+    ).group_by(bucket_start).order_by(bucket_start))
+    
+    return [
+        DailyAppointmentReport(
+            date=row.bucket_start,
+            total_appointments=int(row.pending + row.confirmed + row.completed + row.canceled),
+            pending=int(row.pending),
+            confirmed=int(row.confirmed),
+            completed=int(row.completed),
+            canceled=int(row.canceled)
+        )
+        for row in rows
+    ]
+
+
+@router.get("/timeseries", response_model=List[TimeseriesPoint],
+            summary="سری زمانی نوبت‌ها، نسخه‌ها و فاکتورها")
+@cached_report("appointments", "prescriptions", "factors")
+def get_timeseries_report(
+    entity: str = Query(..., pattern="^(appointments|prescriptions|factors)$"),
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    split: Optional[str] = Query(None, pattern="^(status|factor_type)$"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_aggregate_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
-    Get detailed report of all appointments (Admin only)
-    گزارش تفصیلی تمام نوبت‌ها (فقط مدیر)
+    Get record counts per day, week or month, bucketed in SQL (Admin only)
+    دریافت تعداد رکوردها در هر روز، هفته یا ماه با گروه‌بندی در دیتابیس (فقط مدیر)
+    
+    split=status (appointments) or split=factor_type (factors) returns one series per value.
+    Factor buckets also include total units and cost.
+    با split=status (نوبت‌ها) یا split=factor_type (فاکتورها) برای هر مقدار یک سری برگردانده می‌شود.
+    """
+    date_column, id_column, split_columns = TIMESERIES_ENTITIES[entity]
+    if split and split not in split_columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES["invalid_timeseries_split"]
+        )
+    
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=365)
+    
+    bucket_start = _date_bucket(db, date_column, bucket).label("bucket_start")
+    columns = [bucket_start, func.count(id_column).label("count")]
+    group_by = [bucket_start]
+    
+    if split:
+        series = split_columns[split].label("series")
+        columns.append(series)
+        group_by.append(series)
+    
+    if entity == "factors":
+        columns.append(func.coalesce(func.sum(Factor.units_administered), 0).label("total_units"))
+        columns.append(func.sum(Factor.cost).label("total_cost"))
+    
+    rows = _fetch_within_budget(db.query(*columns).filter(
+        _date_range_condition(date_column, start_date, end_date)
+    ).group_by(*group_by).order_by(*group_by))
+    
+    return [
+        TimeseriesPoint(
+            bucket_start=row.bucket_start,
+            series=getattr(row.series, "value", row.series) if split else None,
+            count=row.count,
+            total_units=int(row.total_units) if entity == "factors" else None,
+            total_cost=float(row.total_cost) if entity == "factors" and row.total_cost is not None else None
+        )
+        for row in rows
+    ]
+
+
+@router.get("/medication-usage", response_model=List[MedicationUsageReport],
+            summary="گزارش مصرف داروها")
+@cached_report("prescriptions", "prescription_items", "medications", "patients", "users")
+def get_medication_usage_report(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    top: int = Query(50, ge=1, le=REPORT_MAX_PAGE_SIZE),
+    db: Session = Depends(get_aggregate_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Get prescribed count and total quantity per medication, highest quantity first (Admin only)
+    تعداد تجویز و مجموع تعداد هر دارو، به ترتیب بیشترین مقدار (فقط مدیر)
     """
     # Set default dates
     if not end_date:
@@ -554,105 +1435,244 @@ async def get_detailed_appointments_report(
     if not start_date:
         start_date = end_date - timedelta(days=30)
     
-    # Build query
-    query = db.query(Appointment).join(Patient).join(User).filter(
+    total_prescribed = func.count(PrescriptionItem.id)
+    total_quantity = func.coalesce(func.sum(PrescriptionItem.quantity), 0)
+    
+    rows = db.query(
+        Medication.id,
+        Medication.name,
+        total_prescribed.label("total_prescribed"),
+        total_quantity.label("total_quantity")
+    ).join(
+        PrescriptionItem, PrescriptionItem.medication_id == Medication.id
+    ).join(
+        Prescription, PrescriptionItem.prescription_id == Prescription.id
+    ).filter(
         and_(
-            Appointment.appointment_date >= datetime.combine(start_date, datetime.min.time()),
-            Appointment.appointment_date <= datetime.combine(end_date, datetime.max.time())
+            Prescription.created_at >= datetime.combine(start_date, datetime.min.time()),
+            Prescription.created_at <= datetime.combine(end_date, datetime.max.time())
         )
+    ).group_by(
+        Medication.id, Medication.name
+    ).order_by(
+        desc(total_quantity), desc(total_prescribed), Medication.id
+    ).limit(top).all()
+    
+    return [
+        MedicationUsageReport(
+            medication_id=row.id,
+            medication_name=row.name,
+            total_prescribed=row.total_prescribed,
+            total_quantity=int(row.total_quantity)
+        )
+        for row in rows
+    ]
+
+
+@router.get("/factor-usage", response_model=List[FactorUsageReport],
+            summary="گزارش مصرف فاکتور به ازای بیمار")
+@cached_report("factors", "patients", "users")
+def get_factor_usage_report(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    factor_type: Optional[str] = None,
+    sort_by: str = Query("cost", pattern="^(cost|units)$"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(REPORT_PAGE_SIZE, ge=1, le=REPORT_MAX_PAGE_SIZE),
+    db: Session = Depends(get_aggregate_report_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Get total units, cost and administrations per patient and factor type (Admin only)
+    مجموع واحدها، هزینه و تعداد تزریق به ازای هر بیمار و نوع فاکتور (فقط مدیر)
+    
+    Sorted by total cost or total units, highest first
+    مرتب شده بر اساس مجموع هزینه یا مجموع واحدها، از بیشترین
+    """
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=180)  # Last 6 months
+    
+    total_units = func.coalesce(func.sum(Factor.units_administered), 0)
+    total_cost = func.coalesce(func.sum(Factor.cost), 0.0)
+    
+    query = db.query(
+        Factor.patient_id,
+        User.full_name,
+        Factor.factor_type,
+        total_units.label("total_units"),
+        total_cost.label("total_cost"),
+        func.count(Factor.id).label("administration_count")
+    ).join(
+        Patient, Factor.patient_id == Patient.id
+    ).join(
+        User, Patient.user_id == User.id
+    ).filter(
+        _date_range_condition(Factor.administration_date, start_date, end_date)
     )
     
-    if status:
-        query = query.filter(Appointment.status == status)
+    if factor_type:
+        query = query.filter(Factor.factor_type.ilike(f"%{factor_type}%"))
     
-    if patient_id:
-        query = query.filter(Appointment.patient_id == patient_id)
+    primary, secondary = (total_cost, total_units) if sort_by == "cost" else (total_units, total_cost)
+    rows = query.group_by(
+        Factor.patient_id, User.full_name, Factor.factor_type
+    ).order_by(
+        desc(primary), desc(secondary), Factor.patient_id, Factor.factor_type
+    ).offset(skip).limit(limit).all()
+    
+    return [
+        FactorUsageReport(
+            patient_id=row.patient_id,
+            patient_name=row.full_name,
+            factor_type=row.factor_type,
+            total_units=int(row.total_units),
+            total_cost=float(row.total_cost),
+            administration_count=row.administration_count
+        )
+        for row in rows
+    ]
+
+
+@router.get("/active-patients", response_model=ActivePatientReport,
+            summary="خلاصه بیماران فعال")
+@cached_report("patients", "users", "appointments", "prescriptions", "factors")
+def get_active_patients_report(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_aggregate_report_db),
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
+):
+    """
+    Get total patients and patients with activity in a date window (Secretary/Admin only)
+    تعداد کل بیماران و بیماران دارای فعالیت در یک بازه زمانی (فقط منشی/مدیر)
+    """
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
     
-    appointments = query.order_by(desc(Appointment.appointment_date)).all()
+    def patients_with(model, date_column):
+        """Count patients with at least one row in the window / شمارش بیماران دارای حداقل یک رکورد در بازه"""
+        activity = db.query(model.id).filter(
+            model.patient_id == Patient.id,
+            _date_range_condition(date_column, start_date, end_date)
+        ).exists()
+        return db.query(func.count(Patient.id)).filter(activity).scalar_subquery()
     
-    results = []
-    for apt in appointments:
-        results.append(AppointmentDetailReport(
-            appointment_id=apt.id,
-            patient_id=apt.patient_id,
-            patient_name=apt.patient.user.full_name,
-            patient_phone=apt.patient.user.phone_number,
-            appointment_date=apt.appointment_date,
-            status=apt.status.value,
-            reason=apt.reason,
-            notes=apt.notes,
-            created_at=apt.created_at
-        ))
+    # All counts in a single round trip / تمام شمارش‌ها در یک درخواست
+    row = db.query(
+        db.query(func.count(Patient.id)).scalar_subquery().label("total_patients"),
+        patients_with(Appointment, Appointment.appointment_date).label("patients_with_appointments"),
+        patients_with(Prescription, Prescription.created_at).label("patients_with_prescriptions"),
+        patients_with(Factor, Factor.administration_date).label("patients_with_factors")
+    ).one()
     
-    return results
+    return ActivePatientReport(**row._asdict())
+
+
+@router.get("/cache-stats", summary="آمار کش گزارش‌ها")
+def get_report_cache_stats(current_user: CurrentUser = Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Get report cache hit rate and memory use (Admin only)
+    دریافت نرخ برخورد و مصرف حافظه کش گزارش‌ها (فقط مدیر)
+    """
+    return report_cache.stats()
 
 
 @router.get("/export/patients-csv", summary="خروجی CSV بیماران تفصیلی")
-async def export_detailed_patients_csv(
+def export_detailed_patients_csv(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    format: str = Query("csv", pattern="^(csv|parquet|arrow|xlsx)$"),
+    db: Session = Depends(get_export_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Export detailed patients report to CSV (Admin only)
     خروجی CSV گزارش تفصیلی بیماران (فقط مدیر)
-    """
-    data = await get_detailed_patients_report(start_date, end_date, None, None, db, current_user)
-    
-    if not data:
-        raise HTTPException(status_code=404, detail="داده‌ای برای خروجی یافت نشد")
-    
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=[
-        'patient_id', 'full_name', 'phone_number', 'national_code', 'gender', 
-        'blood_type', 'age', 'total_appointments', 'completed_appointments', 
-        'canceled_appointments', 'total_prescriptions', 'total_medications',
-        'total_factors', 'total_factor_units', 'total_factor_cost',
-        'has_insurance', 'insurance_company', 'last_appointment_date',
-        'last_prescription_date', 'last_factor_date'
-    ])
-    writer.writeheader()
     
-    for item in data:
-        writer.writerow(item.model_dump())
+    Set format=parquet or format=arrow for a typed columnar file (requires pyarrow),
+    or format=xlsx for an Excel workbook
+    برای فایل ستونی نوع‌دار مقدار format=parquet یا format=arrow (نیازمند pyarrow)
+    و برای فایل اکسل مقدار format=xlsx را ارسال کنید
+    """
+    _check_export_format(format)
     
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=patients_detailed_report.csv"}
+    query = _patients_report_query(db, start_date, end_date, None, None)
+    rows = (
+        _patient_report_row(row).model_dump()
+        for row in _stream_rows(query, settings.REPORT_EXPORT_MAX_ROWS)
     )
+    
+    return _export_response(PatientDetailReport, rows, format, "patients_detailed_report")
 
 
 @router.get("/export/factors-csv", summary="خروجی CSV فاکتورهای تفصیلی")
-async def export_detailed_factors_csv(
+def export_detailed_factors_csv(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    compress: bool = False,
+    format: str = Query("csv", pattern="^(csv|parquet|arrow|xlsx)$"),
+    db: Session = Depends(get_export_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Export detailed factors report to CSV (Admin only)
     خروجی CSV گزارش تفصیلی فاکتورها (فقط مدیر)
+    
+    Set compress=true to receive the stream with gzip Content-Encoding
+    برای دریافت خروجی فشرده با gzip مقدار compress=true را ارسال کنید
+    
+    Set format=parquet or format=arrow for a typed columnar file (requires pyarrow),
+    or format=xlsx for an Excel workbook
+    برای فایل ستونی نوع‌دار مقدار format=parquet یا format=arrow (نیازمند pyarrow)
+    و برای فایل اکسل مقدار format=xlsx را ارسال کنید
     """
-    data = await get_detailed_factors_report(start_date, end_date, None, None, None, db, current_user)
+    _check_export_format(format)
     
-    if not data:
-        raise HTTPException(status_code=404, detail="داده‌ای برای خروجی یافت نشد")
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=180)  # Last 6 months
     
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=[
-        'factor_id', 'patient_id', 'patient_name', 'patient_phone',
-        'factor_type', 'units_administered', 'administration_date',
-        'lot_number', 'administered_by', 'cost', 'notes'
-    ])
-    writer.writeheader()
+    query = _factors_report_query(db, start_date, end_date, None, None, None)
+    rows = (
+        row._asdict()
+        for row in _stream_rows(query, settings.REPORT_EXPORT_MAX_ROWS)
+    )
+    
+    return _export_response(FactorDetailReport, rows, format, "factors_detailed_report", compress)
+
+
+@router.get("/export/appointments", summary="خروجی نوبت‌های تفصیلی")
+def export_detailed_appointments(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    format: str = Query("csv", pattern="^(csv|parquet|arrow|xlsx)$"),
+    db: Session = Depends(get_export_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """
+    Export detailed appointments report as CSV, Parquet, Arrow or XLSX (Admin only)
+    خروجی گزارش تفصیلی نوبت‌ها به صورت CSV، Parquet، Arrow یا XLSX (فقط مدیر)
+    """
+    _check_export_format(format)
+    
+    # Set default dates
+    if not end_date:
+        end_date = date.today()
+    if not start_date:
+        start_date = end_date - timedelta(days=30)
     
-    for item in data:
-        writer.writerow(item.model_dump())
+    query = _appointments_report_query(db, start_date, end_date, None, None)
+    rows = (
+        _appointment_report_item(row).model_dump()
+        for row in _stream_rows(query, settings.REPORT_EXPORT_MAX_ROWS)
+    )
     
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=factors_detailed_report.csv"}
-    )
\ No newline at end of file
+    return _export_response(AppointmentDetailReport, rows, format, "appointments_detailed_report")
@@ -5,19 +5,18 @@ Settings management routes
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.database import get_db
-from app.db.models.user import User
 from app.db.models.settings import Setting
 from app.db.schemas.setting import SettingCreate, SettingUpdate, SettingResponse
-from app.core.security import get_current_admin, get_current_user
+from app.core.security import CurrentUser, get_current_admin, get_current_user
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/settings", tags=["تنظیمات / Settings"])
 
 
 @router.get("/", response_model=SettingResponse, summary="دریافت تنظیمات کلینیک")
-async def get_settings(
+def get_settings(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get clinic settings
@@ -42,10 +41,10 @@ async def get_settings(
 
 
 @router.post("/", response_model=SettingResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد تنظیمات")
-async def create_settings(
+def create_settings(
     setting_data: SettingCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Create clinic settings (Admin only)
@@ -70,10 +69,10 @@ async def create_settings(
 
 
 @router.put("/", response_model=SettingResponse, summary="بروزرسانی تنظیمات")
-async def update_settings(
+def update_settings(
     setting_data: SettingUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Update clinic settings (Admin only)
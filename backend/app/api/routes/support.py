@@ -3,13 +3,14 @@ Support chat routes
 مسیرهای گفتگوی پشتیبانی
 """
 from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Dict
 from app.db.database import get_db
 from app.db.models.user import User
 from app.db.models.support import SupportChat, SupportMessage
 from app.db.schemas.support import SupportChatCreate, SupportChatResponse, SupportMessageCreate, SupportMessageResponse
-from app.core.security import get_current_user, get_current_secretary_or_admin
+from app.core.security import CurrentUser, get_current_user, get_current_secretary_or_admin
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/support", tags=["پشتیبانی / Support"])
@@ -35,10 +36,10 @@ manager = ConnectionManager()
 
 
 @router.post("/chats", response_model=SupportChatResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد گفتگو جدید")
-async def create_chat(
+def create_chat(
     chat_data: SupportChatCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Create new support chat
@@ -61,11 +62,11 @@ async def create_chat(
 
 
 @router.get("/chats", response_model=List[SupportChatResponse], summary="دریافت لیست گفتگوها")
-async def get_chats(
+def get_chats(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get support chats
@@ -90,10 +91,10 @@ async def get_chats(
 
 
 @router.get("/chats/{chat_id}", response_model=SupportChatResponse, summary="دریافت اطلاعات گفتگو")
-async def get_chat(
+def get_chat(
     chat_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Get chat by ID
@@ -124,16 +125,8 @@ async def get_chat(
     return SupportChatResponse(**chat_dict)
 
 
-@router.post("/messages", response_model=SupportMessageResponse, status_code=status.HTTP_201_CREATED, summary="ارسال پیام")
-async def send_message(
-    message_data: SupportMessageCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """
-    Send message to chat
-    ارسال پیام به گفتگو
-    """
+def _save_message(db: Session, message_data: SupportMessageCreate, current_user: CurrentUser) -> dict:
+    """Validate access and store a chat message / بررسی دسترسی و ذخیره پیام گفتگو"""
     # Check if chat exists / بررسی وجود گفتگو
     chat = db.query(SupportChat).filter(SupportChat.id == message_data.chat_id).first()
     if not chat:
@@ -162,6 +155,22 @@ async def send_message(
     
     msg_dict = SupportMessageResponse.model_validate(new_message).model_dump()
     msg_dict["sender_name"] = current_user.full_name
+    return msg_dict
+
+
+@router.post("/messages", response_model=SupportMessageResponse, status_code=status.HTTP_201_CREATED, summary="ارسال پیام")
+async def send_message(
+    message_data: SupportMessageCreate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Send message to chat
+    ارسال پیام به گفتگو
+    """
+    # Database work runs in the threadpool so it does not block the event loop
+    # کار دیتابیس در استخر نخ‌ها اجرا می‌شود تا حلقه رویداد مسدود نشود
+    msg_dict = await run_in_threadpool(_save_message, db, message_data, current_user)
     
     # Try to send via WebSocket / تلاش برای ارسال از طریق وب‌سوکت
     await manager.send_message(message_data.message, message_data.chat_id)
@@ -170,10 +179,10 @@ async def send_message(
 
 
 @router.put("/chats/{chat_id}/close", response_model=SupportChatResponse, summary="بستن گفتگو")
-async def close_chat(
+def close_chat(
     chat_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_secretary_or_admin)
+    current_user: CurrentUser = Depends(get_current_secretary_or_admin)
 ):
     """
     Close support chat (Secretary/Admin only)
@@ -8,17 +8,18 @@ from typing import List
 from app.db.database import get_db
 from app.db.models.user import User
 from app.db.schemas.user import UserCreate, UserUpdate, UserResponse
-from app.core.security import get_password_hash, get_current_admin, get_current_user
+from app.db.rollups import untrack_patient_appointments
+from app.core.security import CurrentUser, get_password_hash, get_current_admin, get_current_user
 from app.utils.messages_fa import ERROR_MESSAGES, SUCCESS_MESSAGES
 
 router = APIRouter(prefix="/users", tags=["مدیریت کاربران / User Management"])
 
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED, summary="ایجاد کاربر جدید")
-async def create_user(
+def create_user(
     user_data: UserCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Create new user (Admin only)
@@ -48,11 +49,11 @@ async def create_user(
 
 
 @router.get("/", response_model=List[UserResponse], summary="دریافت لیست کاربران")
-async def get_users(
+def get_users(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Get all users (Admin only)
@@ -63,19 +64,31 @@ async def get_users(
 
 
 @router.get("/me", response_model=UserResponse, summary="دریافت اطلاعات کاربر جاری")
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+def get_current_user_info(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     """
     Get current user information
     دریافت اطلاعات کاربر جاری
     """
-    return UserResponse.model_validate(current_user)
+    # The authenticated user only carries the token claims; load the full row
+    # کاربر احراز هویت شده فقط اطلاعات توکن را دارد؛ رکورد کامل بارگذاری می‌شود
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES["user_not_found"]
+        )
+    
+    return UserResponse.model_validate(user)
 
 
 @router.get("/{user_id}", response_model=UserResponse, summary="دریافت اطلاعات کاربر")
-async def get_user(
+def get_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Get user by ID (Admin only)
@@ -92,11 +105,11 @@ async def get_user(
 
 
 @router.put("/{user_id}", response_model=UserResponse, summary="بروزرسانی کاربر")
-async def update_user(
+def update_user(
     user_id: int,
     user_data: UserUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Update user (Admin only)
@@ -125,10 +138,10 @@ async def update_user(
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT, summary="حذف کاربر")
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin)
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """
     Delete user (Admin only)
@@ -141,6 +154,10 @@ async def delete_user(
             detail=ERROR_MESSAGES["user_not_found"]
         )
     
+    # Appointments are removed by cascade / نوبت‌ها به صورت آبشاری حذف می‌شوند
+    if user.patient:
+        untrack_patient_appointments(db, user.patient.id)
+    
     db.delete(user)
     db.commit()
     
@@ -0,0 +1,228 @@
+"""
+In-memory caches for report results and authenticated users
+کش درون حافظه برای نتایج گزارش‌ها و کاربران احراز هویت شده
+"""
+from collections import OrderedDict
+from datetime import date, datetime
+from functools import wraps
+from typing import Any, Dict, Iterable, Optional, Tuple
+import enum
+import pickle
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+# Session info key for tables written in the current transaction
+# کلید اطلاعات نشست برای جداول نوشته شده در تراکنش جاری
+_WRITTEN_TABLES_KEY = "report_cache_written_tables"
+
+
+class ReportCache:
+    """
+    Size-bounded LRU cache with TTL and table-based invalidation
+    کش LRU با اندازه محدود، زمان انقضا و ابطال بر اساس جدول
+    
+    Entries are local to the worker process; the TTL bounds staleness across workers.
+    Each table has a generation counter that invalidation bumps. A reader
+    captures the generations before it queries and its result is not stored
+    if a write committed in between, so a slow read cannot cache stale data
+    after the invalidation that should have removed it.
+    ورودی‌ها مختص هر پروسه هستند؛ زمان انقضا کهنگی بین پروسه‌ها را محدود می‌کند.
+    شمارنده نسل هر جدول از ذخیره نتیجه خوانده شده پیش از یک نوشتن جلوگیری می‌کند.
+    """
+    
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, Tuple[float, Any, frozenset]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_skips = 0
+    
+    def get(self, key: tuple) -> Optional[Any]:
+        """Return a fresh cached value or None / برگرداندن مقدار معتبر کش یا None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def generation(self, tables: Iterable[str]) -> Tuple[int, ...]:
+        """Current generations of the tables, in sorted table order / نسل فعلی جداول"""
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in sorted(tables))
+    
+    def set(self, key: tuple, value: Any, tables: Iterable[str], generation: Optional[Tuple[int, ...]] = None) -> None:
+        """
+        Store a value that depends on the given tables / ذخیره مقداری وابسته به جداول داده شده
+        
+        With a generation from before the value was computed, the value is
+        dropped if any of the tables has been written since.
+        در صورت نوشته شدن یکی از جداول پس از گرفتن نسل، مقدار ذخیره نمی‌شود.
+        """
+        tables = frozenset(tables)
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(table, 0) for table in sorted(tables)):
+                self.stale_skips += 1
+                return
+            self._entries[key] = (time.monotonic(), value, tables)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def invalidate(self, key: tuple) -> None:
+        """Drop a single entry / حذف یک ورودی"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+    
+    def invalidate_tables(self, tables: Iterable[str]) -> None:
+        """Drop every entry that depends on one of the tables / حذف ورودی‌های وابسته به این جداول"""
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry[2] & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+    
+    def clear(self) -> None:
+        """Remove all entries / حذف تمام ورودی‌ها"""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache statistics for monitoring / آمار کش برای پایش
+        
+        memory_bytes is the pickled size of the entries, measured here rather
+        than on every set, so it costs only the caller of this method.
+        اندازه حافظه فقط هنگام درخواست آمار محاسبه می‌شود، نه در هر ذخیره.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats = {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "stale_skips": self.stale_skips,
+            }
+            values = [entry[1] for entry in self._entries.values()]
+        
+        stats["memory_bytes"] = sum(len(pickle.dumps(value)) for value in values)
+        return stats
+
+
+report_cache = ReportCache(
+    ttl_seconds=settings.REPORT_CACHE_TTL_SECONDS,
+    max_entries=settings.REPORT_CACHE_MAX_ENTRIES
+)
+
+# Fields of authenticated users keyed by (user_id,); validated against the
+# shared revocation list in app.core.security._load_user
+# فیلدهای کاربران احراز هویت شده با کلید (user_id,)؛ اعتبارسنجی با فهرست ابطال مشترک
+auth_user_cache = ReportCache(
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES
+)
+
+
+def _normalize(value: Any) -> Any:
+    """Turn a query parameter into a hashable, canonical value / تبدیل پارامتر به مقدار استاندارد"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def cached_report(*tables: str):
+    """
+    Cache an endpoint's result by endpoint name and normalized query parameters
+    کش نتیجه یک مسیر بر اساس نام آن و پارامترهای استاندارد شده
+    
+    Wraps sync (threadpool) endpoints. `db` and `current_user` are not part of the key,
+    so only use it on endpoints whose result does not depend on the caller.
+    `db` و `current_user` جزو کلید نیستند؛ فقط برای مسیرهایی که نتیجه‌شان به کاربر وابسته نیست.
+    
+    Invalidation sees ORM flushes and ORM bulk statements (query.update(),
+    db.execute(update(Model))...). Raw SQL run with text() or on a connection
+    is not seen and relies on the TTL.
+    دستورات SQL خام (text یا روی اتصال) دیده نمی‌شوند و به زمان انقضا وابسته‌اند.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(**kwargs):
+            key = (func.__name__,) + tuple(sorted(
+                (name, _normalize(value))
+                for name, value in kwargs.items()
+                if name not in ("db", "current_user")
+            ))
+            
+            cached = report_cache.get(key)
+            if cached is not None:
+                return cached
+            
+            generation = report_cache.generation(tables)
+            result = func(**kwargs)
+            report_cache.set(key, result, tables, generation)
+            return result
+        
+        return wrapper
+    
+    return decorator
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session, flush_context):
+    """Remember which tables the transaction wrote / ثبت جداول نوشته شده در تراکنش"""
+    written = session.info.setdefault(_WRITTEN_TABLES_KEY, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            written.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_bulk_writes(orm_execute_state):
+    """
+    Remember tables written by ORM bulk statements, which skip the flush events
+    ثبت جداول نوشته شده با دستورات گروهی ORM که از رویدادهای flush عبور نمی‌کنند
+    """
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            orm_execute_state.session.info.setdefault(_WRITTEN_TABLES_KEY, set()).add(table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_written_tables(session):
+    """Invalidate cached reports after a successful commit / ابطال گزارش‌های کش شده پس از ثبت"""
+    written = session.info.pop(_WRITTEN_TABLES_KEY, None)
+    if written:
+        report_cache.invalidate_tables(written)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    """Forget writes of a rolled back transaction / نادیده گرفتن نوشتن‌های تراکنش برگشت خورده"""
+    session.info.pop(_WRITTEN_TABLES_KEY, None)
@@ -11,6 +11,10 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    # Threads for sync route handlers; 0 matches DB_POOL_SIZE + DB_MAX_OVERFLOW
+    THREADPOOL_WORKERS: int = 0
     
     # JWT
     SECRET_KEY: str
@@ -18,6 +22,38 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     
+    # Revoked token store
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    TOKEN_REVOCATION_SYNC_SECONDS: int = 5
+    TOKEN_REVOCATION_PRUNE_SECONDS: int = 3600
+    
+    # Authenticated user cache
+    AUTH_USER_CACHE_TTL_SECONDS: int = 60
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Login rate limits (token buckets per IP and per phone number)
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_IP_BUCKET_SIZE: int = 5
+    LOGIN_IP_REFILL_PER_MINUTE: float = 10
+    LOGIN_PHONE_BUCKET_SIZE: int = 5
+    LOGIN_PHONE_REFILL_PER_MINUTE: float = 5
+    LOGIN_LIMIT_MAX_KEYS: int = 100000
+    # Proxy addresses or networks whose X-Forwarded-For header names the client
+    LOGIN_TRUSTED_PROXIES: List[str] = []
+    
+    # Password hashing (calibrate_password_hash.py picks the cost for the host)
+    PASSWORD_HASH_SCHEME: str = "bcrypt"
+    PASSWORD_HASH_TARGET_MS: int = 250
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 2
+    
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
     BACKEND_CORS_ORIGINS: Union[str, List[str]] = [
         "http://localhost:1212",
         "http://localhost:5500",
@@ -26,6 +62,35 @@ class Settings(BaseSettings):
         "http://127.0.0.1:5500",
     ]
     
+    # Report cache
+    REPORT_CACHE_TTL_SECONDS: int = 120
+    REPORT_CACHE_MAX_ENTRIES: int = 256
+    
+    # Report query budgets (statement timeout is enforced on MySQL only)
+    REPORT_STATEMENT_TIMEOUT_MS: int = 10000
+    REPORT_AGGREGATE_STATEMENT_TIMEOUT_MS: int = 30000
+    REPORT_EXPORT_STATEMENT_TIMEOUT_MS: int = 300000
+    REPORT_MAX_ROWS: int = 20000
+    REPORT_EXPORT_MAX_ROWS: int = 200000
+    REPORT_JOB_MAX_ROWS: int = 2000000
+    
+    # Delta reports: how far back changed_since may go; older tombstones are pruned
+    REPORT_DELTA_MAX_AGE_DAYS: int = 30
+    REPORT_TOMBSTONE_PRUNE_SECONDS: int = 3600
+    
+    # Background report jobs
+    REPORT_JOB_WORKERS: int = 2
+    REPORT_JOB_MAX_PENDING: int = 20
+    REPORT_JOB_DIR: str = "report_jobs"
+    REPORT_JOB_RESULT_TTL_MINUTES: int = 60
+    REPORT_JOB_MAX_RUNTIME_MINUTES: int = 60
+    REPORT_JOB_SWEEP_SECONDS: int = 300
+    
+    # Event loop monitor (opt-in)
+    EVENT_LOOP_MONITOR_ENABLED: bool = False
+    EVENT_LOOP_MONITOR_INTERVAL_MS: int = 50
+    EVENT_LOOP_BLOCK_THRESHOLD_MS: int = 100
+    
     # Application
     APP_NAME: str = "Clinic Management System"
     DEBUG: bool = True
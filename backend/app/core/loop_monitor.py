@@ -0,0 +1,148 @@
+"""
+Event loop lag monitor
+پایش تاخیر حلقه رویداد
+
+A sampler task measures how late the event loop wakes up from a short sleep,
+and a watchdog thread reports the stack of whatever holds the loop longer
+than the blocking threshold.
+یک وظیفه نمونه‌بردار تاخیر بیدار شدن حلقه را اندازه می‌گیرد و یک نخ نگهبان
+پشته کدی را که حلقه را بیش از حد مجاز مسدود کند ثبت می‌کند.
+"""
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import inspect
+import logging
+import sys
+import threading
+import time
+import traceback
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Event loop lag sampler and blocking detector / نمونه‌بردار تاخیر و تشخیص مسدود شدن حلقه"""
+
+    def __init__(self, interval_ms: int, threshold_ms: int, max_samples: int = 2048, max_blocks: int = 20):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self._samples = deque(maxlen=max_samples)
+        self._blocks = deque(maxlen=max_blocks)
+        self._lock = threading.Lock()
+        self._route_names: Dict[Any, str] = {}
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.blocked_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, app) -> None:
+        """Start sampling on the running loop / شروع نمونه‌برداری روی حلقه جاری"""
+        # Map endpoint code objects to route names so a stack can be attributed
+        # نگاشت کد مسیرها به نام آن‌ها برای تشخیص مسیر از روی پشته
+        for route in app.routes:
+            endpoint = getattr(route, "endpoint", None)
+            code = getattr(inspect.unwrap(endpoint), "__code__", None) if endpoint else None
+            if code is not None:
+                methods = ",".join(sorted(getattr(route, "methods", None) or ["WS"]))
+                self._route_names[code] = f"{methods} {route.path}"
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the sampler and watchdog / توقف نمونه‌بردار و نگهبان"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            with self._lock:
+                self._samples.append(max(now - started - self.interval, 0.0))
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled > self.threshold and heartbeat != reported_heartbeat:
+                reported_heartbeat = heartbeat
+                self._report_block(stalled)
+
+    def _report_block(self, stalled: float) -> None:
+        """Log the loop thread's stack and the route it is running / ثبت پشته و مسیر مسدود کننده"""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        route = None
+        cursor = frame
+        while cursor is not None and route is None:
+            route = self._route_names.get(cursor.f_code)
+            cursor = cursor.f_back
+
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        with self._lock:
+            self.blocked_count += 1
+            self._blocks.append({
+                "detected_at": datetime.now(),
+                "route": route,
+                "stalled_ms": round(stalled * 1000, 1),
+            })
+
+        logger.warning(
+            "Event loop blocked for more than %.0f ms in %s\n%s",
+            stalled * 1000, route or "unknown route", stack
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Lag percentiles and recent blocks / صدک‌های تاخیر و آخرین انسدادها"""
+        with self._lock:
+            samples = sorted(self._samples)
+            blocks = list(self._blocks)
+            blocked_count = self.blocked_count
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000, 2)
+
+        return {
+            "enabled": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "samples": len(samples),
+            "lag_ms": {
+                "p50": percentile(0.50),
+                "p90": percentile(0.90),
+                "p99": percentile(0.99),
+                "max": round(samples[-1] * 1000, 2) if samples else None,
+            },
+            "blocked_count": blocked_count,
+            "recent_blocks": blocks,
+        }
+
+
+loop_monitor = LoopMonitor(
+    interval_ms=settings.EVENT_LOOP_MONITOR_INTERVAL_MS,
+    threshold_ms=settings.EVENT_LOOP_BLOCK_THRESHOLD_MS
+)
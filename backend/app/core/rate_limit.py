@@ -0,0 +1,223 @@
+"""
+Login admission control
+کنترل پذیرش درخواست‌های ورود
+"""
+from typing import Any, Dict, Tuple
+import ipaddress
+import threading
+import time
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from app.core.config import settings
+from app.utils.messages_fa import ERROR_MESSAGES
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets in a plain dict
+    سطل‌های توکن برای هر کلید در یک دیکشنری ساده
+    
+    Each key maps to (tokens, updated_at). Buckets that have refilled
+    completely carry no state, so they are dropped on periodic eviction and
+    a key costs memory only while it is being throttled.
+    سطل‌هایی که کاملا پر شده‌اند در پاکسازی دوره‌ای حذف می‌شوند.
+    """
+    
+    def __init__(self, capacity: int, refill_per_minute: float, max_keys: int, evict_seconds: int = 60):
+        self.capacity = capacity
+        self.rate = refill_per_minute / 60
+        self.max_keys = max_keys
+        self.evict_seconds = evict_seconds
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._evicted_at = time.monotonic()
+        self.allowed = 0
+        self.rejected = 0
+    
+    def take(self, key: str) -> float:
+        """
+        Take one token; returns 0 when allowed, else seconds until the next token
+        برداشتن یک توکن؛ در صورت رد شدن، ثانیه‌های باقی مانده تا توکن بعدی
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._tokens(key, now)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                self.allowed += 1
+                return 0.0
+            
+            self._buckets[key] = (tokens, now)
+            self.rejected += 1
+            return (1 - tokens) / self.rate
+    
+    def refund(self, key: str) -> None:
+        """Give back a token taken by take / بازگرداندن توکن برداشته شده"""
+        now = time.monotonic()
+        with self._lock:
+            self._buckets[key] = (min(self.capacity, self._tokens(key, now) + 1), now)
+    
+    def _tokens(self, key: str, now: float) -> float:
+        """Refilled token count of a key; caller holds the lock / تعداد توکن‌های کلید پس از پر شدن"""
+        if now - self._evicted_at >= self.evict_seconds or len(self._buckets) >= self.max_keys:
+            self._evict(now)
+        
+        tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated_at) * self.rate)
+    
+    def _evict(self, now: float) -> None:
+        self._evicted_at = now
+        full_after = self.capacity / self.rate
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket[1] < full_after
+        }
+        
+        # Still over the limit (e.g. spoofed keys): keep the most recent half
+        # همچنان بیش از حد مجاز: نیمه اخیر نگهداری می‌شود
+        if len(self._buckets) >= self.max_keys:
+            recent = sorted(self._buckets.items(), key=lambda item: item[1][1])[len(self._buckets) // 2:]
+            self._buckets = dict(recent)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "refill_per_minute": self.rate * 60,
+            "tracked_keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+class LoginRateLimiter:
+    """
+    Per-IP and per-phone number limits checked before any password work
+    محدودیت هر IP و هر شماره تلفن پیش از هرگونه بررسی رمز عبور
+    
+    Only failed logins stay charged to the IP bucket, so staff behind one
+    clinic NAT can all sign in while a password guesser is still stopped.
+    فقط ورودهای ناموفق از سطل IP کسر می‌شوند تا کارکنان پشت یک NAT بتوانند وارد شوند.
+    """
+    
+    def __init__(self):
+        self.enabled = settings.LOGIN_RATE_LIMIT_ENABLED
+        self.trusted_proxies = [
+            ipaddress.ip_network(network, strict=False) for network in settings.LOGIN_TRUSTED_PROXIES
+        ]
+        self.by_ip = TokenBucketLimiter(
+            settings.LOGIN_IP_BUCKET_SIZE, settings.LOGIN_IP_REFILL_PER_MINUTE, settings.LOGIN_LIMIT_MAX_KEYS
+        )
+        self.by_phone = TokenBucketLimiter(
+            settings.LOGIN_PHONE_BUCKET_SIZE, settings.LOGIN_PHONE_REFILL_PER_MINUTE, settings.LOGIN_LIMIT_MAX_KEYS
+        )
+    
+    def check_ip(self, ip: str) -> float:
+        """Seconds until the IP may retry, 0 when allowed / زمان انتظار IP، صفر در صورت مجاز بودن"""
+        return self.by_ip.take(ip) if self.enabled else 0.0
+    
+    def refund_ip(self, ip: str) -> None:
+        """Give back the IP's token when the login did not fail / بازگرداندن توکن IP در صورت ناموفق نبودن ورود"""
+        if self.enabled:
+            self.by_ip.refund(ip)
+    
+    def client_ip(self, scope) -> str:
+        """
+        Client address, read from X-Forwarded-For when the peer is a trusted proxy
+        آدرس کلاینت؛ در صورت مورد اعتماد بودن پروکسی از X-Forwarded-For خوانده می‌شود
+        
+        Hops are read from the right and the first untrusted one is the client,
+        so a forged leftmost entry is ignored.
+        آدرس‌ها از راست خوانده می‌شوند تا آدرس جعلی ابتدای سرآیند نادیده گرفته شود.
+        """
+        client = scope.get("client")
+        address = client[0] if client else "unknown"
+        if not self._is_trusted(address):
+            return address
+        
+        hops = [
+            hop.strip()
+            for name, value in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+            for hop in value.decode("latin-1").split(",")
+            if hop.strip()
+        ]
+        for hop in reversed(hops):
+            if not self._is_trusted(hop):
+                return hop
+            address = hop
+        return address
+    
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+    
+    def check_phone(self, phone_number: str) -> None:
+        """Raise 429 when the phone number's bucket is empty / خطای 429 در صورت خالی بودن سطل شماره"""
+        retry_after = self.by_phone.take(phone_number) if self.enabled else 0.0
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=ERROR_MESSAGES["too_many_login_attempts"],
+                headers={"Retry-After": str(int(retry_after) + 1)},
+            )
+    
+    def refund_phone(self, phone_number: str) -> None:
+        """Give back the phone number's token when the password was right / بازگرداندن توکن شماره در صورت صحیح بودن رمز"""
+        if self.enabled:
+            self.by_phone.refund(phone_number)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "ip": self.by_ip.stats(),
+            "phone": self.by_phone.stats(),
+        }
+
+
+login_limiter = LoginRateLimiter()
+
+
+class LoginRateLimitMiddleware:
+    """
+    ASGI middleware applying the per-IP login limit
+    میان‌افزار ASGI برای اعمال محدودیت ورود هر IP
+    
+    Rejected requests are answered before the body is read or validated, so
+    a flood from one address costs little more than a 404. The IP bucket is
+    checked before the phone number bucket, so one source cannot drain the
+    buckets of the numbers it targets. The IP's token is taken up front, so
+    concurrent attempts cannot all pass the check, and given back unless the
+    login fails with 401.
+    درخواست‌های رد شده پیش از خواندن بدنه پاسخ داده می‌شوند؛ توکن IP پیش از
+    اجرا برداشته و در صورت عدم پاسخ 401 بازگردانده می‌شود.
+    """
+    
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST" and scope["path"] == self.path:
+            ip = login_limiter.client_ip(scope)
+            retry_after = login_limiter.check_ip(ip)
+            if retry_after:
+                response = JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={"detail": ERROR_MESSAGES["too_many_login_attempts"]},
+                    headers={"Retry-After": str(int(retry_after) + 1)},
+                )
+                await response(scope, receive, send)
+                return
+            
+            async def send_and_refund(message):
+                if message["type"] == "http.response.start" and message["status"] != status.HTTP_401_UNAUTHORIZED:
+                    login_limiter.refund_ip(ip)
+                await send(message)
+            
+            await self.app(scope, receive, send_and_refund)
+            return
+        
+        await self.app(scope, receive, send)
@@ -0,0 +1,369 @@
+"""
+Token revocation: per-user revocation list and revoked token id store
+ابطال توکن: فهرست ابطال کاربران و مخزن شناسه توکن‌های باطل شده
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional, Set
+import hashlib
+import math
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models.token import RevokedToken, UserTokenRevocation
+
+# Session info key for user revocations written in the current transaction
+# کلید اطلاعات نشست برای ابطال‌های کاربر ثبت شده در تراکنش جاری
+_PENDING_REVOCATIONS_KEY = "token_revocations_pending"
+
+
+class TokenRevocationList:
+    """
+    Per-user "tokens issued before" timestamps
+    زمان «توکن‌های صادر شده پیش از» برای هر کاربر
+    
+    Revoking a user rejects every access token issued before that moment.
+    Revocations are rows in user_token_revocations, written in the same
+    transaction as the account change and shared by all workers. Each worker
+    keeps the recent ones in memory and pulls those made by the others at most
+    every sync interval. Entries older than the access token lifetime are
+    dropped, since those tokens have expired anyway.
+    ابطال‌ها در همان تراکنش تغییر حساب در جدول مشترک ثبت می‌شوند و هر کارگر
+    ابطال‌های دیگران را حداکثر پس از یک بازه همگام‌سازی دریافت می‌کند.
+    """
+    
+    # Re-read window that covers revocations committed out of order
+    # بازه بازخوانی برای ابطال‌هایی که با ترتیب متفاوت ثبت شده‌اند
+    SYNC_OVERLAP_SECONDS = 60
+    
+    def __init__(self, retention_seconds: int, sync_seconds: int):
+        self.retention_seconds = retention_seconds
+        self.sync_seconds = sync_seconds
+        self._revoked_before: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+        self._watermark: Optional[float] = None
+    
+    def revoke(self, user_id: int, revoked_at: float) -> None:
+        """Apply a committed revocation locally / اعمال محلی ابطال ثبت شده"""
+        with self._lock:
+            self._apply(user_id, revoked_at)
+    
+    def is_revoked(self, db: Session, user_id: int, issued_at: float) -> bool:
+        """Check a token's iat against the user's entry / بررسی زمان صدور توکن"""
+        revoked_before = self.revoked_before(db, user_id)
+        return revoked_before is not None and issued_at < revoked_before
+    
+    def revoked_before(self, db: Session, user_id: int) -> Optional[float]:
+        """
+        Latest revocation of a user known to this worker, after syncing
+        آخرین ابطال شناخته شده کاربر در این کارگر، پس از همگام‌سازی
+        """
+        self._sync(db)
+        return self._revoked_before.get(user_id)
+    
+    def _apply(self, user_id: int, revoked_at: float) -> None:
+        if revoked_at > self._revoked_before.get(user_id, 0.0):
+            self._revoked_before[user_id] = revoked_at
+    
+    def _sync(self, db: Session) -> None:
+        """Pull revocations made by other workers / دریافت ابطال‌های ثبت شده توسط کارگرهای دیگر"""
+        if time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = time.monotonic()
+            expired_before = time.time() - self.retention_seconds
+            since = expired_before
+            if self._watermark is not None:
+                since = max(since, self._watermark - self.SYNC_OVERLAP_SECONDS)
+            
+            rows = db.query(UserTokenRevocation.user_id, UserTokenRevocation.revoked_at).filter(
+                UserTokenRevocation.revoked_at >= since
+            ).all()
+            for user_id, revoked_at in rows:
+                self._apply(user_id, revoked_at)
+            
+            if rows:
+                self._watermark = max(revoked_at for _, revoked_at in rows)
+            elif self._watermark is None:
+                self._watermark = time.time()
+            
+            self._revoked_before = {
+                user_id: revoked_at for user_id, revoked_at in self._revoked_before.items()
+                if revoked_at >= expired_before
+            }
+        finally:
+            self._lock.release()
+    
+    def __len__(self) -> int:
+        return len(self._revoked_before)
+
+
+token_revocations = TokenRevocationList(
+    retention_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS
+)
+
+
+def _changed_user_ids(session: Session) -> Set[int]:
+    """Users whose token claims change with this flush / کاربرانی که اطلاعات توکن آن‌ها تغییر می‌کند"""
+    user_ids = set()
+    for obj in list(session.dirty) + list(session.deleted):
+        if getattr(obj, "__tablename__", None) == "users" and obj.id is not None:
+            user_ids.add(obj.id)
+    
+    # A new or removed patient record changes the user's patient_id claim
+    # ایجاد یا حذف پرونده بیمار شناسه بیمار در توکن کاربر را تغییر می‌دهد
+    for obj in list(session.new) + list(session.deleted):
+        if getattr(obj, "__tablename__", None) == "patients" and obj.user_id is not None:
+            user_ids.add(obj.user_id)
+    return user_ids
+
+
+@event.listens_for(Session, "before_flush")
+def _record_user_revocations(session, flush_context, instances):
+    """
+    Revoke the tokens of every changed user in the same transaction as the change
+    ابطال توکن‌های هر کاربر تغییر یافته در همان تراکنش تغییر
+    """
+    user_ids = _changed_user_ids(session)
+    if not user_ids:
+        return
+    
+    revoked_at = time.time()
+    pending = session.info.setdefault(_PENDING_REVOCATIONS_KEY, {})
+    for user_id in user_ids:
+        session.add(UserTokenRevocation(user_id=user_id, revoked_at=revoked_at))
+        pending[user_id] = revoked_at
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_user_revocations(session):
+    """Take effect on this worker immediately / اعمال فوری روی همین کارگر"""
+    for user_id, revoked_at in session.info.pop(_PENDING_REVOCATIONS_KEY, {}).items():
+        token_revocations.revoke(user_id, revoked_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_revocations(session):
+    """Forget revocations of a rolled back transaction / نادیده گرفتن ابطال‌های تراکنش برگشت خورده"""
+    session.info.pop(_PENDING_REVOCATIONS_KEY, None)
+
+
+def _utcnow() -> datetime:
+    """Naive UTC now, matching the stored columns / زمان فعلی UTC بدون منطقه زمانی"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over string keys
+    فیلتر بلوم با اندازه ثابت برای کلیدهای رشته‌ای
+    
+    A miss is definite; a hit may be a false positive at roughly error_rate
+    once capacity keys have been added.
+    عدم وجود قطعی است؛ وجود ممکن است مثبت کاذب باشد.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, key: str) -> Iterator[int]:
+        # Double hashing over one 128-bit digest / دو هش از یک چکیده ۱۲۸ بیتی
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+    
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevokedTokenStore:
+    """
+    Revoked token ids: a Bloom filter in front of the revoked_tokens table
+    شناسه‌های توکن باطل شده: فیلتر بلوم در جلوی جدول revoked_tokens
+    
+    Almost every lookup is answered by the filter in memory. Only filter hits
+    are confirmed against the table, which is the exact record shared by all
+    workers. Each worker pulls revocations made by the others at most every
+    sync interval.
+    تقریبا تمام بررسی‌ها در حافظه پاسخ داده می‌شوند و فقط موارد مثبت با جدول
+    مشترک بین کارگرها تایید می‌شوند.
+    """
+    
+    # Re-read window that covers revocations committed out of order
+    # بازه بازخوانی برای ابطال‌هایی که با ترتیب متفاوت ثبت شده‌اند
+    SYNC_OVERLAP = timedelta(seconds=60)
+    
+    def __init__(self, capacity: int, error_rate: float, sync_seconds: int):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_seconds = sync_seconds
+        self._filter = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._synced_at = 0.0
+        self._watermark: Optional[datetime] = None
+        self.filter_hits = 0
+        self.false_positives = 0
+    
+    def revoke(self, jti: str, expires_at: int) -> bool:
+        """
+        Persist a revocation; False when the token was already revoked
+        ثبت ابطال؛ در صورت باطل بودن قبلی مقدار False برمی‌گرداند
+        
+        The primary key makes this atomic, so a refresh token can be
+        rotated only once even by concurrent requests on different workers.
+        The insert commits in its own short session, so the revocation holds
+        whatever the caller's transaction does and never commits it.
+        کلید اصلی این عمل را اتمیک می‌کند تا توکن تازه‌سازی فقط یک بار قابل استفاده باشد؛
+        درج در نشست جداگانه ثبت می‌شود و به تراکنش فراخواننده دست نمی‌زند.
+        """
+        session = SessionLocal()
+        try:
+            session.add(RevokedToken(
+                jti=jti,
+                revoked_at=_utcnow(),
+                expires_at=datetime.fromtimestamp(expires_at, timezone.utc).replace(tzinfo=None)
+            ))
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return False
+        finally:
+            session.close()
+        
+        with self._lock:
+            self._add(jti)
+        return True
+    
+    def is_revoked(self, db: Session, jti: str) -> bool:
+        """Check a token id / بررسی شناسه توکن"""
+        self._sync(db)
+        if jti not in self._filter:
+            return False
+        
+        # Filter hit; confirm against the table / تایید مورد مثبت با جدول
+        self.filter_hits += 1
+        revoked = db.query(RevokedToken.jti).filter(RevokedToken.jti == jti).first() is not None
+        if not revoked:
+            self.false_positives += 1
+        return revoked
+    
+    def _add(self, jti: str) -> None:
+        if jti not in self._filter:
+            self._filter.add(jti)
+    
+    def _sync(self, db: Session) -> None:
+        """Pull revocations made by other workers / دریافت ابطال‌های ثبت شده توسط کارگرهای دیگر"""
+        if time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._synced_at = time.monotonic()
+            query = db.query(RevokedToken.jti, RevokedToken.revoked_at).filter(
+                RevokedToken.expires_at > _utcnow()
+            )
+            
+            # A full reload drops expired ids once the filter is past capacity
+            # بارگذاری کامل پس از پر شدن فیلتر، شناسه‌های منقضی را حذف می‌کند
+            rebuild = self._watermark is None or self._filter.count > self._filter.capacity
+            if not rebuild:
+                query = query.filter(RevokedToken.revoked_at >= self._watermark - self.SYNC_OVERLAP)
+            rows = query.all()
+            
+            if rebuild:
+                bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+                for jti, _ in rows:
+                    bloom.add(jti)
+                self._filter = bloom
+            else:
+                for jti, _ in rows:
+                    self._add(jti)
+            
+            if rows:
+                self._watermark = max(revoked_at for _, revoked_at in rows)
+            elif self._watermark is None:
+                self._watermark = _utcnow()
+        finally:
+            self._lock.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Filter size and hit counters / اندازه فیلتر و شمارنده‌ها"""
+        return {
+            "filter_entries": self._filter.count,
+            "filter_capacity": self._filter.capacity,
+            "filter_bits": self._filter.size,
+            "filter_hits": self.filter_hits,
+            "false_positives": self.false_positives,
+        }
+
+
+def refresh_token_id(token: str, payload: Dict[str, Any]) -> str:
+    """
+    Id under which a refresh token is revoked: its jti, or for tokens issued
+    before jti was added, a hash of the token of the same length
+    شناسه ابطال توکن تازه‌سازی: jti یا برای توکن‌های قدیمی بدون jti، هش توکن
+    """
+    return payload.get("jti") or hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+revoked_tokens = RevokedTokenStore(
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    sync_seconds=settings.TOKEN_REVOCATION_SYNC_SECONDS
+)
+
+_pruner_stop = threading.Event()
+
+
+def prune_expired_revocations(db: Session) -> int:
+    """
+    Delete revoked token ids past their expiry and user revocations past the
+    access token lifetime; returns the number of rows removed
+    حذف شناسه‌های توکن منقضی شده و ابطال‌های کاربر قدیمی‌تر از عمر توکن دسترسی
+    """
+    removed = db.query(RevokedToken).filter(
+        RevokedToken.expires_at <= _utcnow()
+    ).delete(synchronize_session=False)
+    removed += db.query(UserTokenRevocation).filter(
+        UserTokenRevocation.revoked_at < time.time() - token_revocations.retention_seconds
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+def start_pruner() -> None:
+    """Prune expired revocations every TOKEN_REVOCATION_PRUNE_SECONDS / پاکسازی دوره‌ای ابطال‌های منقضی شده"""
+    def prune():
+        while not _pruner_stop.wait(settings.TOKEN_REVOCATION_PRUNE_SECONDS):
+            db = SessionLocal()
+            try:
+                prune_expired_revocations(db)
+            except SQLAlchemyError:
+                db.rollback()
+            finally:
+                db.close()
+    
+    _pruner_stop.clear()
+    threading.Thread(target=prune, name="token-revocation-pruner", daemon=True).start()
+
+
+def stop_pruner() -> None:
+    """Stop the revocation pruner / توقف پاکسازی ابطال‌ها"""
+    _pruner_stop.set()
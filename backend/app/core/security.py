@@ -2,34 +2,200 @@
 Security utilities for authentication and authorization
 ابزارهای امنیتی برای احراز هویت و مجوزدهی
 """
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import threading
+import time
+import uuid
 import jwt
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
+from passlib.hash import argon2 as argon2_hasher
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.db.database import get_db
-from app.db.models.user import User
+from app.db.models.user import User, UserRole
+from app.db.models.patient import Patient
+from app.core.cache import auth_user_cache
+from app.core.revocation import revoked_tokens, token_revocations
 from app.utils.messages_fa import ERROR_MESSAGES
 
+# Supported password hash schemes / الگوریتم‌های پشتیبانی شده رمزنگاری
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
+
+
+def build_password_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+    argon2_parallelism: int = settings.ARGON2_PARALLELISM
+) -> CryptContext:
+    """
+    Password hashing context for the configured scheme and cost
+    زمینه رمزنگاری رمز عبور برای الگوریتم و هزینه تنظیم شده
+    
+    The configured cost is the only accepted one, so hashes made with another
+    cost or with the other scheme are reported by needs_update and replaced
+    at the next successful login.
+    هش‌هایی با هزینه یا الگوریتم دیگر در ورود موفق بعدی جایگزین می‌شوند.
+    """
+    if scheme not in PASSWORD_HASH_SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME must be one of {PASSWORD_HASH_SCHEMES}, got {scheme!r}")
+    if scheme == "argon2" and not argon2_hasher.has_backend():
+        raise RuntimeError("PASSWORD_HASH_SCHEME=argon2 requires argon2-cffi (pip install argon2-cffi)")
+    
+    return CryptContext(
+        schemes=[scheme] + [name for name in PASSWORD_HASH_SCHEMES if name != scheme],
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
 # Password hashing context / رمزنگاری رمز عبور
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_password_context()
 
 # Bearer token security / امنیت توکن Bearer
 security = HTTPBearer()
 
 
+@dataclass(frozen=True)
+class CurrentUser:
+    """
+    Authenticated user as seen by the routes: the token claims
+    کاربر احراز هویت شده از دید مسیرها: اطلاعات توکن
+    
+    Built from the access token claims, or for tokens without claims from
+    the auth cache. Routes that need other columns load the user row.
+    مسیرهایی که به ستون‌های دیگر نیاز دارند رکورد کاربر را بارگذاری می‌کنند.
+    """
+    id: int
+    role: UserRole
+    is_active: bool
+    full_name: Optional[str] = None
+    patient_id: Optional[int] = None
+
+
+class PasswordHashPool:
+    """
+    Bounded thread pool for bcrypt work with queue-wait metrics
+    استخر نخ محدود برای bcrypt همراه با معیار زمان انتظار در صف
+    
+    bcrypt releases the GIL, so hashes run in parallel up to `workers`; past
+    `max_pending` queued or running jobs new requests are rejected with 503
+    instead of piling up behind a login burst.
+    bcrypt قفل GIL را آزاد می‌کند؛ بیش از `max_pending` کار در صف با خطای 503 رد می‌شود.
+    """
+    
+    def __init__(self, workers: int, max_pending: int, max_samples: int = 1024):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._waits = deque(maxlen=max_samples)
+        self._durations = deque(maxlen=max_samples)
+        self.completed = 0
+        self.rejected = 0
+    
+    def submit(self, func, *args) -> Future:
+        """Queue a hashing call or raise 503 when the queue is full / افزودن به صف یا خطای 503"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=ERROR_MESSAGES["server_busy"],
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+        return self._executor.submit(self._run, time.monotonic(), func, *args)
+    
+    def _run(self, submitted_at: float, func, *args):
+        started_at = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.monotonic()
+            with self._lock:
+                self._pending -= 1
+                self.completed += 1
+                self._waits.append(started_at - submitted_at)
+                self._durations.append(finished_at - started_at)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Pool metrics for monitoring / معیارهای استخر برای پایش"""
+        with self._lock:
+            waits = sorted(self._waits)
+            durations = sorted(self._durations)
+            pending = self._pending
+        
+        def percentile(samples, fraction: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000, 2)
+        
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": {
+                "p50": percentile(waits, 0.50),
+                "p95": percentile(waits, 0.95),
+                "max": percentile(waits, 1.0),
+            },
+            "hash_ms": {
+                "p50": percentile(durations, 0.50),
+                "p95": percentile(durations, 0.95),
+                "max": percentile(durations, 1.0),
+            },
+        }
+
+
+password_hash_pool = PasswordHashPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password / تایید رمز عبور"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hash_pool.submit(pwd_context.verify, plain_password, hashed_password).result()
 
 
 def get_password_hash(password: str) -> str:
     """Hash password / رمزنگاری رمز عبور"""
-    return pwd_context.hash(password)
+    return password_hash_pool.submit(pwd_context.hash, password).result()
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password without holding a worker thread while queued / تایید رمز بدون اشغال نخ"""
+    future = password_hash_pool.submit(pwd_context.verify, plain_password, hashed_password)
+    return await asyncio.wrap_future(future)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify password and return a new hash when the stored one is outdated
+    تایید رمز و بازگرداندن هش جدید در صورت قدیمی بودن هش ذخیره شده
+    """
+    future = password_hash_pool.submit(pwd_context.verify_and_update, plain_password, hashed_password)
+    return await asyncio.wrap_future(future)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -45,13 +211,34 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({
         "exp": expire,
         "type": "access",
-        "iat": datetime.now(timezone.utc)  # Issued at time
+        # Issued at time, with sub-second precision for the revocation list
+        "iat": datetime.now(timezone.utc).timestamp(),
+        "jti": uuid.uuid4().hex  # Token id for revocation
     })
     
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def create_user_access_token(db: Session, user: User) -> str:
+    """
+    Create an access token carrying the claims the auth layer needs, so
+    authorized requests can be served without loading the user
+    ایجاد توکن دسترسی همراه با اطلاعات لازم برای احراز هویت بدون مراجعه به دیتابیس
+    """
+    patient_id = None
+    if user.role == UserRole.PATIENT:
+        patient_id = db.query(Patient.id).filter(Patient.user_id == user.id).scalar()
+    
+    return create_access_token(data={
+        "sub": user.id,
+        "role": user.role.value,
+        "active": user.is_active,
+        "pid": patient_id,
+        "name": user.full_name,
+    })
+
+
 def create_refresh_token(data: dict) -> str:
     """Create JWT refresh token / ایجاد توکن تازه‌سازی"""
     to_encode = data.copy()
@@ -62,7 +249,8 @@ def create_refresh_token(data: dict) -> str:
     to_encode.update({
         "exp": expire,
         "type": "refresh",
-        "iat": datetime.now(timezone.utc)  # Issued at time
+        "iat": datetime.now(timezone.utc),  # Issued at time
+        "jti": uuid.uuid4().hex  # Token id for rotation and revocation
     })
     
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -99,10 +287,10 @@ def decode_token(token: str) -> dict:
         )
 
 
-async def get_current_user(
+def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> CurrentUser:
     """Get current authenticated user / دریافت کاربر احراز هویت شده"""
     try:
         token = credentials.credentials
@@ -125,14 +313,36 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Query user from database
-        user = db.query(User).filter(User.id == user_id).first()
-        if user is None:
+        # Logged out tokens; the in-memory filter answers almost every check
+        # توکن‌های خارج شده؛ فیلتر درون حافظه تقریبا همه بررسی‌ها را پاسخ می‌دهد
+        jti = payload.get("jti")
+        if jti is not None and revoked_tokens.is_revoked(db, jti):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=ERROR_MESSAGES.get("user_not_found", "User not found"),
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=ERROR_MESSAGES.get("invalid_token", "Token revoked"),
+                headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Tokens with claims need no lookup; changes to the user revoke them
+        # توکن‌های دارای اطلاعات کاربر نیازی به دیتابیس ندارند؛ تغییر کاربر آن‌ها را باطل می‌کند
+        if "role" in payload:
+            if token_revocations.is_revoked(db, user_id, payload.get("iat", 0)):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail=ERROR_MESSAGES.get("invalid_token", "Token revoked"),
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            
+            user = CurrentUser(
+                id=user_id,
+                role=UserRole(payload["role"]),
+                is_active=payload.get("active", False),
+                full_name=payload.get("name"),
+                patient_id=payload.get("pid")
+            )
+        else:
+            user = _load_user(db, user_id)
+        
         # Check if user is active
         if not user.is_active:
             raise HTTPException(
@@ -152,7 +362,47 @@ async def get_current_user(
         )
 
 
-async def get_current_admin(current_user: User = Depends(get_current_user)) -> User:
+def _load_user(db: Session, user_id: int) -> CurrentUser:
+    """
+    Load the user for tokens without claims, through the auth cache
+    بارگذاری کاربر برای توکن‌های بدون اطلاعات کاربر، از طریق کش احراز هویت
+    
+    Every change to a user writes a row to the shared revocation list, so an
+    entry is kept only while the user's latest revocation is the one seen
+    when it was loaded. Changes made on another worker reach this cache at
+    the next revocation sync, like the tokens they revoke.
+    هر تغییر کاربر یک ابطال مشترک ثبت می‌کند؛ ورودی کش فقط تا زمانی معتبر است که
+    آخرین ابطال کاربر همان ابطال دیده شده هنگام بارگذاری باشد.
+    """
+    revoked_before = token_revocations.revoked_before(db, user_id)
+    cached = auth_user_cache.get((user_id,))
+    if cached is not None and cached[0] == revoked_before:
+        return CurrentUser(**cached[1])
+    
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.get("user_not_found", "User not found"),
+        )
+    
+    # Same claims as create_user_access_token puts in new tokens
+    # همان اطلاعاتی که create_user_access_token در توکن‌های جدید قرار می‌دهد
+    patient_id = None
+    if user.role == UserRole.PATIENT:
+        patient_id = db.query(Patient.id).filter(Patient.user_id == user.id).scalar()
+    current_user = CurrentUser(
+        id=user.id,
+        role=user.role,
+        is_active=user.is_active,
+        full_name=user.full_name,
+        patient_id=patient_id
+    )
+    auth_user_cache.set((user_id,), (revoked_before, asdict(current_user)), ())
+    return current_user
+
+
+async def get_current_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Verify user is admin / تایید کاربر به عنوان مدیر"""
     if current_user.role != "Admin":
         raise HTTPException(
@@ -162,7 +412,7 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
     return current_user
 
 
-async def get_current_secretary_or_admin(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_secretary_or_admin(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """Verify user is secretary or admin / تایید کاربر به عنوان منشی یا مدیر"""
     if current_user.role not in ["Admin", "Secretary"]:
         raise HTTPException(
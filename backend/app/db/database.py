@@ -2,15 +2,22 @@
 Database connection and session management
 مدیریت اتصال و نشست پایگاه داده
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+# MySQL error raised when max_execution_time is exceeded
+# خطای MySQL هنگام عبور از حداکثر زمان اجرای کوئری
+MYSQL_QUERY_TIMEOUT_ERROR = 3024
+
 # Create database engine / ایجاد موتور پایگاه داده
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
     echo=settings.DEBUG
 )
 
@@ -33,6 +40,45 @@ def get_db():
         db.close()
 
 
+def get_budgeted_db(statement_timeout_ms: int):
+    """
+    Build a session dependency whose SELECT statements are cut off after
+    statement_timeout_ms milliseconds
+    ساخت وابستگی نشستی که کوئری‌های SELECT آن پس از زمان مشخص متوقف می‌شوند
+    """
+    def dependency():
+        db = SessionLocal()
+        db.info["statement_timeout_ms"] = statement_timeout_ms
+        try:
+            yield db
+        finally:
+            db.close()
+    
+    return dependency
+
+
+@event.listens_for(SessionLocal, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    """
+    Set max_execution_time on the pooled connection when it differs from what
+    this session needs, so a report budget never leaks into other requests
+    تنظیم زمان مجاز روی اتصال، تا بودجه گزارش به درخواست‌های دیگر منتقل نشود
+    """
+    if connection.dialect.name != "mysql":
+        return
+    
+    timeout_ms = session.info.get("statement_timeout_ms", 0)
+    if connection.info.get("statement_timeout_ms", 0) != timeout_ms:
+        connection.exec_driver_sql(f"SET SESSION max_execution_time = {int(timeout_ms)}")
+        connection.info["statement_timeout_ms"] = timeout_ms
+
+
+def is_statement_timeout(error: OperationalError) -> bool:
+    """Check whether a database error is a statement timeout / بررسی خطای پایان زمان کوئری"""
+    args = getattr(error.orig, "args", ())
+    return bool(args) and args[0] == MYSQL_QUERY_TIMEOUT_ERROR
+
+
 def init_db():
     """
     Initialize database and create tables
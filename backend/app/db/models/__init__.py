@@ -5,4 +5,6 @@ from .appointment import Appointment
 from .prescription import Prescription
 from .factor import Factor
 from .insurance import Insurance
-from .medication import Medication
\ No newline at end of file
+from .medication import Medication
+from .report import DailyAppointmentRollup, DeletedRecord
+from .token import RevokedToken, UserTokenRevocation
@@ -27,8 +27,8 @@ class Appointment(Base):
     status = Column(Enum(AppointmentStatus), default=AppointmentStatus.PENDING)
     reason = Column(Text)
     notes = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     
     # Relationships / روابط
     patient = relationship("Patient", back_populates="appointments")
\ No newline at end of file
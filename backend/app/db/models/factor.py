@@ -21,8 +21,8 @@ class Factor(Base):
     administered_by = Column(String(255))  # Staff name / نام پرسنل
     notes = Column(Text)
     cost = Column(Float)  # Cost of treatment / هزینه درمان
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), index=True)
     
     # Relationships / روابط
     patient = relationship("Patient", back_populates="factors")
\ No newline at end of file
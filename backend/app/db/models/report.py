@@ -0,0 +1,33 @@
+"""
+Report rollup models
+مدل‌های تجمیعی گزارش
+"""
+from sqlalchemy import Column, Integer, String, Date, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class DailyAppointmentRollup(Base):
+    """Per-day appointment counts by status / تعداد نوبت‌های هر روز بر اساس وضعیت"""
+    __tablename__ = "daily_appointment_rollups"
+    
+    date = Column(Date, primary_key=True)
+    pending = Column(Integer, nullable=False, default=0)
+    confirmed = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+    canceled = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class DeletedRecord(Base):
+    """Tombstone of a deleted row for delta reports / رکورد حذف شده برای گزارش تغییرات"""
+    __tablename__ = "deleted_records"
+    
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    __table_args__ = (
+        Index("ix_deleted_records_table_deleted_at", "table_name", "deleted_at"),
+    )
@@ -0,0 +1,34 @@
+"""
+Token revocation models
+مدل‌های ابطال توکن
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Double, Index
+from app.db.database import Base
+
+
+class RevokedToken(Base):
+    """Revoked JWT id until the token expires / شناسه توکن باطل شده تا زمان انقضا"""
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(32), primary_key=True)
+    revoked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_revoked_tokens_revoked_at", "revoked_at"),
+        Index("ix_revoked_tokens_expires_at", "expires_at"),
+    )
+
+
+class UserTokenRevocation(Base):
+    """Access tokens of a user issued before revoked_at are rejected / رد توکن‌های صادر شده پیش از زمان ابطال"""
+    __tablename__ = "user_token_revocations"
+    
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    # Epoch seconds, compared with the token's iat / ثانیه‌های epoch برای مقایسه با زمان صدور توکن
+    revoked_at = Column(Double, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_user_token_revocations_revoked_at", "revoked_at"),
+    )
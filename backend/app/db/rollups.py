@@ -0,0 +1,114 @@
+"""
+Incremental maintenance of report rollup tables
+نگهداری تدریجی جداول تجمیعی گزارش
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Date, func, insert
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.db.models.appointment import Appointment, AppointmentStatus
+from app.db.models.report import DailyAppointmentRollup
+
+# Rollup column for each appointment status / ستون تجمیعی هر وضعیت نوبت
+STATUS_COLUMNS = {
+    AppointmentStatus.PENDING: "pending",
+    AppointmentStatus.CONFIRMED: "confirmed",
+    AppointmentStatus.COMPLETED: "completed",
+    AppointmentStatus.CANCELED: "canceled",
+}
+
+
+def apply_appointment_delta(
+    db: Session,
+    appointment_date: Optional[datetime],
+    appointment_status: Optional[AppointmentStatus],
+    delta: int
+) -> None:
+    """
+    Add delta to the rollup counter of one day and status
+    افزودن delta به شمارنده تجمیعی یک روز و وضعیت
+    
+    Runs inside the caller's transaction, so it commits together with the appointment change.
+    A single upsert statement, so concurrent first writes of a day do not collide.
+    در تراکنش فراخوانی‌کننده اجرا می‌شود تا همراه با تغییر نوبت ثبت شود؛ درج یا بروزرسانی
+    در یک دستور انجام می‌شود تا اولین نوشتن‌های همزمان یک روز با هم تداخل نداشته باشند.
+    """
+    if appointment_date is None:
+        return
+    
+    column_name = STATUS_COLUMNS[AppointmentStatus(appointment_status or AppointmentStatus.PENDING)]
+    column = getattr(DailyAppointmentRollup, column_name)
+    values = {"date": appointment_date.date(), **{name: 0 for name in STATUS_COLUMNS.values()}}
+    values[column_name] = delta
+    increment = {column_name: column + delta, "updated_at": func.now()}
+    
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        statement = mysql_insert(DailyAppointmentRollup).values(**values).on_duplicate_key_update(**increment)
+    elif dialect == "sqlite":
+        statement = sqlite_insert(DailyAppointmentRollup).values(**values).on_conflict_do_update(
+            index_elements=[DailyAppointmentRollup.date], set_=increment
+        )
+    else:
+        _savepoint_upsert(db, values, column, delta)
+        return
+    db.execute(statement)
+
+
+def _savepoint_upsert(db: Session, values: dict, column, delta: int) -> None:
+    """
+    Insert in a savepoint and fall back to an update if the day already exists
+    درج در savepoint و در صورت وجود روز، بروزرسانی آن
+    """
+    try:
+        with db.begin_nested():
+            db.execute(insert(DailyAppointmentRollup).values(**values))
+    except IntegrityError:
+        db.query(DailyAppointmentRollup).filter(
+            DailyAppointmentRollup.date == values["date"]
+        ).update({column: column + delta}, synchronize_session=False)
+
+
+def track_appointment(db: Session, appointment: Appointment, delta: int = 1) -> None:
+    """Count (or uncount with delta=-1) an appointment / شمارش یا حذف شمارش یک نوبت"""
+    apply_appointment_delta(db, appointment.appointment_date, appointment.status, delta)
+
+
+def untrack_patient_appointments(db: Session, patient_id: int) -> None:
+    """
+    Remove a patient's appointments from the rollup before a cascading delete
+    حذف نوبت‌های یک بیمار از جدول تجمیعی پیش از حذف آبشاری
+    """
+    rows = db.query(Appointment.appointment_date, Appointment.status).filter(
+        Appointment.patient_id == patient_id
+    ).all()
+    for appointment_date, appointment_status in rows:
+        apply_appointment_delta(db, appointment_date, appointment_status, -1)
+
+
+def rebuild_daily_appointment_rollup(db: Session) -> int:
+    """
+    Rebuild the daily appointment rollup from the appointments table
+    بازسازی جدول تجمیعی روزانه نوبت‌ها از جدول نوبت‌ها
+    
+    Returns the number of days written. / تعداد روزهای نوشته شده را برمی‌گرداند.
+    """
+    day = func.date(Appointment.appointment_date, type_=Date)
+    grouped = db.query(day, Appointment.status, func.count(Appointment.id)).group_by(
+        day, Appointment.status
+    ).all()
+    
+    days = defaultdict(dict)
+    for appointment_day, appointment_status, count in grouped:
+        column_name = STATUS_COLUMNS[appointment_status or AppointmentStatus.PENDING]
+        days[appointment_day][column_name] = days[appointment_day].get(column_name, 0) + count
+    
+    db.query(DailyAppointmentRollup).delete(synchronize_session=False)
+    db.add_all(DailyAppointmentRollup(date=appointment_day, **counts) for appointment_day, counts in days.items())
+    db.commit()
+    
+    return len(days)
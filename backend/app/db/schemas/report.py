@@ -4,7 +4,7 @@ Report schemas
 """
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import date
+from datetime import date, datetime
 
 
 class DailyAppointmentReport(BaseModel):
@@ -43,9 +43,35 @@ class FactorUsageReport(BaseModel):
     administration_count: int
 
 
+class TimeseriesPoint(BaseModel):
+    """Time bucket of a timeseries report / بازه زمانی گزارش سری زمانی"""
+    bucket_start: date
+    series: Optional[str] = Field(None, description="وضعیت یا نوع فاکتور در صورت تفکیک")
+    count: int
+    total_units: Optional[int] = None
+    total_cost: Optional[float] = None
+
+
 class ReportExportRequest(BaseModel):
     """Report export request schema / اسکیمای درخواست خروجی گزارش"""
     format: str = Field(..., description="فرمت خروجی: csv یا json")
     report_type: str = Field(..., description="نوع گزارش")
     start_date: Optional[date] = Field(None, description="تاریخ شروع")
-    end_date: Optional[date] = Field(None, description="تاریخ پایان")
\ No newline at end of file
+    end_date: Optional[date] = Field(None, description="تاریخ پایان")
+    count_rows: bool = Field(False, description="شمارش سطرها برای نمایش پیشرفت (یک کوئری اضافه)")
+
+
+class ReportJobResponse(BaseModel):
+    """Background report job status schema / اسکیمای وضعیت کار پس‌زمینه گزارش"""
+    job_id: str
+    status: str = Field(..., description="queued, running, completed یا failed")
+    report_type: str
+    format: str
+    rows_written: int
+    total_rows: Optional[int] = None
+    progress: float = Field(..., description="پیشرفت بین 0 و 1")
+    error: Optional[str] = None
+    created_at: datetime
+    deadline: datetime = Field(..., description="زمانی که کار در صف یا در حال اجرا پس از آن ناموفق می‌شود")
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
\ No newline at end of file
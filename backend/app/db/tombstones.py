@@ -0,0 +1,84 @@
+"""
+Tombstones for deleted report rows
+ثبت شناسه رکوردهای حذف شده برای گزارش‌های تغییرات
+"""
+from datetime import datetime, timedelta
+from typing import List
+import threading
+from sqlalchemy import event, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models.report import DeletedRecord
+
+# Tables whose deletions are reported to delta consumers
+# جداولی که حذف رکوردهایشان در گزارش تغییرات اعلام می‌شود
+TOMBSTONE_TABLES = {"appointments", "factors"}
+
+_pruner_stop = threading.Event()
+
+
+@event.listens_for(Session, "before_flush")
+def _record_deletions(session, flush_context, instances):
+    """
+    Add a tombstone for every tracked row deleted in this flush, including
+    rows removed by ORM cascades (e.g. a patient's appointments)
+    ثبت رکورد حذف برای هر سطر حذف شده، از جمله حذف‌های آبشاری
+    """
+    for obj in session.deleted:
+        table_name = getattr(obj, "__tablename__", None)
+        if table_name in TOMBSTONE_TABLES:
+            session.add(DeletedRecord(table_name=table_name, record_id=obj.id))
+
+
+def deleted_ids_since(db: Session, table_name: str, since: datetime) -> List[int]:
+    """Get ids deleted from a table since a watermark / شناسه‌های حذف شده از زمان مشخص"""
+    rows = db.query(DeletedRecord.record_id).filter(
+        DeletedRecord.table_name == table_name,
+        DeletedRecord.deleted_at >= since
+    ).order_by(DeletedRecord.record_id).distinct().all()
+    return [row.record_id for row in rows]
+
+
+def oldest_delta_watermark(now: datetime) -> datetime:
+    """
+    Oldest changed_since still served; tombstones before it may be pruned
+    قدیمی‌ترین changed_since قابل پاسخ؛ رکوردهای حذف پیش از آن ممکن است پاک شده باشند
+    """
+    return now - timedelta(days=settings.REPORT_DELTA_MAX_AGE_DAYS)
+
+
+def prune_tombstones(db: Session) -> int:
+    """
+    Delete tombstones older than REPORT_DELTA_MAX_AGE_DAYS, by the database
+    clock that stamped them; returns the number of rows removed
+    حذف رکوردهای حذف قدیمی‌تر از REPORT_DELTA_MAX_AGE_DAYS بر اساس ساعت دیتابیس
+    """
+    cutoff = oldest_delta_watermark(db.query(func.now()).scalar())
+    removed = db.query(DeletedRecord).filter(
+        DeletedRecord.deleted_at < cutoff
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removed
+
+
+def start_tombstone_pruner() -> None:
+    """Prune old tombstones every REPORT_TOMBSTONE_PRUNE_SECONDS / پاکسازی دوره‌ای رکوردهای حذف قدیمی"""
+    def prune():
+        while not _pruner_stop.wait(settings.REPORT_TOMBSTONE_PRUNE_SECONDS):
+            db = SessionLocal()
+            try:
+                prune_tombstones(db)
+            except SQLAlchemyError:
+                db.rollback()
+            finally:
+                db.close()
+    
+    _pruner_stop.clear()
+    threading.Thread(target=prune, name="tombstone-pruner", daemon=True).start()
+
+
+def stop_tombstone_pruner() -> None:
+    """Stop the tombstone pruner / توقف پاکسازی رکوردهای حذف"""
+    _pruner_stop.set()
@@ -6,12 +6,16 @@ This file initializes the FastAPI application and includes all routers.
 این فایل برنامه FastAPI را راه‌اندازی کرده و تمام روترها را اضافه می‌کند.
 """
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
 from contextlib import asynccontextmanager
+from anyio import to_thread
 
 from app.core.config import settings
-from app.db.database import engine, Base
+from app.db.database import engine, Base, is_statement_timeout
+from app.utils.messages_fa import ERROR_MESSAGES
 from app.api.routes import (
     auth,
     users,
@@ -23,8 +27,14 @@ from app.api.routes import (
     insurances,
     settings as settings_routes,
     support,
-    reports
+    reports,
+    report_jobs,
+    metrics
 )
+from app.core.loop_monitor import loop_monitor
+from app.core.rate_limit import LoginRateLimitMiddleware
+from app.core.revocation import start_pruner, stop_pruner
+from app.db.tombstones import start_tombstone_pruner, stop_tombstone_pruner
 
 
 # Lifespan context manager for startup and shutdown events
@@ -44,6 +54,26 @@ async def lifespan(app: FastAPI):
     # ایجاد تمام جداول (در صورت عدم استفاده از Alembic)
     Base.metadata.create_all(bind=engine)
     
+    # Sync handlers run in the threadpool and each holds a pooled connection:
+    # threads beyond the pool would only queue for a connection
+    # هر نخ یک اتصال دیتابیس نگه می‌دارد؛ نخ‌های بیش از اندازه استخر فقط منتظر اتصال می‌مانند
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.THREADPOOL_WORKERS or settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    )
+    
+    # Periodic purge of expired report jobs / پاکسازی دوره‌ای کارهای گزارش منقضی شده
+    report_jobs.start_sweeper()
+    
+    # Periodic prune of expired token revocations / پاکسازی دوره‌ای ابطال‌های منقضی شده
+    start_pruner()
+    
+    # Periodic prune of tombstones past the delta window / پاکسازی دوره‌ای رکوردهای حذف قدیمی
+    start_tombstone_pruner()
+    
+    # Optional event loop lag monitor / پایش اختیاری تاخیر حلقه رویداد
+    if settings.EVENT_LOOP_MONITOR_ENABLED:
+        loop_monitor.start(app)
+    
     yield
     
     # Shutdown: Cleanup
@@ -51,6 +81,13 @@ async def lifespan(app: FastAPI):
     print("🛑 خاموش‌سازی برنامه...")
     print("🛑 Shutting down application...")
 
+    # Stop background report workers
+    # توقف کارگرهای گزارش پس‌زمینه
+    report_jobs.shutdown_workers()
+    stop_pruner()
+    stop_tombstone_pruner()
+    await loop_monitor.stop()
+
 
 # Initialize FastAPI application
 # راه‌اندازی برنامه FastAPI
@@ -91,6 +128,10 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Login flood protection (added first so CORS headers still wrap its 429s)
+# محافظت در برابر حجم بالای درخواست ورود
+app.add_middleware(LoginRateLimitMiddleware, path="/api/v1/auth/auth/login")
+
 # CORS Configuration
 # تنظیمات CORS
 app.add_middleware(
@@ -102,6 +143,18 @@ app.add_middleware(
 )
 
 
+# Report queries that exceed their statement timeout become 503 responses
+# کوئری‌های گزارشی که از زمان مجاز عبور کنند پاسخ 503 برمی‌گردانند
+@app.exception_handler(OperationalError)
+async def database_error_handler(request: Request, exc: OperationalError):
+    if not is_statement_timeout(exc):
+        raise exc
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": ERROR_MESSAGES["report_timeout"]}
+    )
+
+
 # Include routers
 # اضافه کردن روترها
 app.include_router(
@@ -170,6 +223,18 @@ app.include_router(
     tags=["گزارش‌ها / Reports"]
 )
 
+app.include_router(
+    report_jobs.router,
+    prefix="/api/v1/reports",
+    tags=["کارهای گزارش / Report Jobs"]
+)
+
+app.include_router(
+    metrics.router,
+    prefix="/api/v1/metrics",
+    tags=["معیارها / Metrics"]
+)
+
 
 # Root endpoint
 # نقطه ورود اصلی
@@ -0,0 +1,66 @@
+"""
+Shared test fixtures
+فیکسچرهای مشترک تست‌ها
+"""
+import os
+import tempfile
+
+# Settings are read on import, so the test environment is set up first
+# تنظیمات هنگام import خوانده می‌شوند، بنابراین محیط تست ابتدا آماده می‌شود
+_TEST_DIR = tempfile.mkdtemp(prefix="clinic-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_TEST_DIR, "test.db")
+os.environ["SECRET_KEY"] = "test-secret-key-not-for-production"
+os.environ["DEBUG"] = "false"
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["REPORT_JOB_DIR"] = os.path.join(_TEST_DIR, "report_jobs")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import Base, SessionLocal, engine
+from app.db.models.user import User, UserRole
+from app.core.cache import auth_user_cache, report_cache
+from app.core.security import create_user_access_token
+
+
+@pytest.fixture(autouse=True)
+def database():
+    """Fresh tables and empty caches for every test / جداول تازه و کش خالی برای هر تست"""
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    report_cache.clear()
+    auth_user_cache.clear()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def make_headers(db):
+    """Bearer headers for a user / هدر احراز هویت برای یک کاربر"""
+    def make(user: User) -> dict:
+        return {"Authorization": f"Bearer {create_user_access_token(db, user)}"}
+    return make
+
+
+@pytest.fixture
+def admin(db):
+    user = User(phone_number="09120000000", password_hash="-", full_name="مدیر سیستم", role=UserRole.ADMIN)
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def admin_headers(admin, make_headers):
+    return make_headers(admin)
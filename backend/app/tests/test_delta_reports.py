@@ -0,0 +1,36 @@
+"""
+Delta report watermarks and tombstone retention
+نشانه‌های زمانی گزارش تغییرات و نگهداری رکوردهای حذف
+"""
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.db.models import DeletedRecord
+from app.db.tombstones import prune_tombstones
+from app.utils.messages_fa import ERROR_MESSAGES
+
+FACTORS_URL = "/api/v1/reports/reports/advanced/factors"
+
+
+def test_changed_since_past_the_max_age_is_gone(client, admin_headers):
+    recent = datetime.utcnow() - timedelta(days=settings.REPORT_DELTA_MAX_AGE_DAYS - 1)
+    response = client.get(FACTORS_URL, params={"changed_since": recent.isoformat()}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["next_watermark"] is not None
+
+    expired = datetime.utcnow() - timedelta(days=settings.REPORT_DELTA_MAX_AGE_DAYS + 1)
+    response = client.get(FACTORS_URL, params={"changed_since": expired.isoformat()}, headers=admin_headers)
+    assert response.status_code == 410
+    assert response.json()["detail"] == ERROR_MESSAGES["delta_watermark_expired"]
+
+
+def test_old_tombstones_are_pruned(db):
+    now = datetime.utcnow()
+    db.add_all([
+        DeletedRecord(table_name="factors", record_id=1,
+                      deleted_at=now - timedelta(days=settings.REPORT_DELTA_MAX_AGE_DAYS + 1)),
+        DeletedRecord(table_name="factors", record_id=2, deleted_at=now - timedelta(days=1)),
+    ])
+    db.commit()
+
+    assert prune_tombstones(db) == 1
+    assert [record_id for record_id, in db.query(DeletedRecord.record_id)] == [2]
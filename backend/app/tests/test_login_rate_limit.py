@@ -0,0 +1,75 @@
+"""
+Login rate limits
+محدودیت نرخ ورود
+"""
+import pytest
+from app.api.routes import auth
+from app.core import rate_limit
+from app.core.config import settings
+from app.core.rate_limit import LoginRateLimiter
+from app.core.security import get_password_hash
+from app.db.models.user import User, UserRole
+
+LOGIN_URL = "/api/v1/auth/auth/login"
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """Fresh buckets for each test / سطل‌های تازه برای هر تست"""
+    fresh = LoginRateLimiter()
+    monkeypatch.setattr(rate_limit, "login_limiter", fresh)
+    monkeypatch.setattr(auth, "login_limiter", fresh)
+    return fresh
+
+
+def _add_staff(db, count):
+    password_hash = get_password_hash("secret1")
+    phones = [f"0912100{i:04d}" for i in range(count)]
+    db.add_all(
+        User(phone_number=phone, password_hash=password_hash, full_name=f"منشی {i}", role=UserRole.SECRETARY)
+        for i, phone in enumerate(phones)
+    )
+    db.commit()
+    return phones
+
+
+def test_successful_logins_behind_one_address(client, db, limiter):
+    # A clinic NAT: many staff, one address / NAT کلینیک: کارکنان زیاد با یک آدرس
+    phones = _add_staff(db, settings.LOGIN_IP_BUCKET_SIZE * 3)
+    for phone in phones:
+        response = client.post(LOGIN_URL, json={"phone_number": phone, "password": "secret1"})
+        assert response.status_code == 200
+
+
+def test_successful_logins_of_one_number(client, db, limiter):
+    # One account used from several devices / یک حساب از چند دستگاه
+    phone = _add_staff(db, 1)[0]
+    for _ in range(settings.LOGIN_PHONE_BUCKET_SIZE * 3):
+        response = client.post(LOGIN_URL, json={"phone_number": phone, "password": "secret1"})
+        assert response.status_code == 200
+
+
+def test_failed_logins_are_limited_per_address(client, db, limiter):
+    phones = _add_staff(db, settings.LOGIN_IP_BUCKET_SIZE + 1)
+    for phone in phones[:-1]:
+        response = client.post(LOGIN_URL, json={"phone_number": phone, "password": "wrong-password"})
+        assert response.status_code == 401
+
+    response = client.post(LOGIN_URL, json={"phone_number": phones[-1], "password": "secret1"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+
+def test_client_address_through_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_TRUSTED_PROXIES", ["10.0.0.0/8"])
+    limiter = LoginRateLimiter()
+
+    def scope(peer, forwarded=None):
+        headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+        return {"client": (peer, 50000), "headers": headers}
+
+    # Forged leftmost entry is ignored / آدرس جعلی ابتدای سرآیند نادیده گرفته می‌شود
+    assert limiter.client_ip(scope("10.0.0.5", "1.2.3.4, 203.0.113.7, 10.0.0.9")) == "203.0.113.7"
+    assert limiter.client_ip(scope("10.0.0.5")) == "10.0.0.5"
+    # Untrusted peers cannot pick their own address / کلاینت غیر قابل اعتماد آدرس خود را تعیین نمی‌کند
+    assert limiter.client_ip(scope("198.51.100.1", "1.2.3.4")) == "198.51.100.1"
@@ -0,0 +1,66 @@
+"""
+Query budget of the single-patient report
+بودجه کوئری گزارش تک بیمار
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.api.routes.reports import SINGLE_PATIENT_REPORT_QUERY_BUDGET
+from app.core.security import CurrentUser, get_current_user
+from app.db.models import Appointment, Factor, Insurance, Medication, Patient, Prescription, User
+from app.db.models.prescription import PrescriptionItem
+from app.db.models.user import UserRole
+from app.main import app
+
+
+def _seed_patient(db) -> int:
+    """A patient with rows in every section of the report / بیمار با داده در تمام بخش‌های گزارش"""
+    now = datetime.now()
+    user = User(phone_number="09121111111", password_hash="-", full_name="بیمار تست", role=UserRole.PATIENT)
+    db.add(user)
+    db.flush()
+    patient = Patient(user_id=user.id, national_code="0012345678")
+    db.add(patient)
+    db.flush()
+    db.add(Insurance(patient_id=patient.id, insurance_company="Co", policy_number="P1", coverage_type="Basic"))
+
+    medications = [Medication(name=f"Med{i}", unit_price=1.5) for i in range(3)]
+    db.add_all(medications)
+    db.flush()
+    for i in range(6):
+        db.add(Appointment(patient_id=patient.id, appointment_date=now + timedelta(days=i - 3), reason="checkup"))
+        prescription = Prescription(patient_id=patient.id, doctor_name="Dr", diagnosis="d",
+                                    created_at=now - timedelta(days=i))
+        db.add(prescription)
+        db.flush()
+        for medication in medications:
+            db.add(PrescriptionItem(prescription_id=prescription.id, medication_id=medication.id,
+                                    dosage="x", quantity=1))
+        db.add(Factor(patient_id=patient.id, factor_type="Factor VIII", units_administered=500, cost=10.5,
+                      administration_date=now - timedelta(days=i), created_at=now - timedelta(days=i)))
+    db.commit()
+    return patient.id
+
+
+def test_single_patient_report_query_budget(client, db, admin):
+    patient_id = _seed_patient(db)
+
+    # Authentication is outside the budget: a claims-only user, as built from a token
+    # احراز هویت خارج از بودجه است: کاربر ساخته شده از اطلاعات توکن
+    current_user = CurrentUser(id=admin.id, role=UserRole.ADMIN, is_active=True)
+    app.dependency_overrides[get_current_user] = lambda: current_user
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", count)
+    try:
+        response = client.get(f"/api/v1/reports/reports/advanced/patient/{patient_id}")
+    finally:
+        event.remove(Engine, "before_cursor_execute", count)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert response.status_code == 200
+    assert len(response.json()["recent_prescriptions"]) == 5
+    assert len(statements) <= SINGLE_PATIENT_REPORT_QUERY_BUDGET, "\n".join(statements)
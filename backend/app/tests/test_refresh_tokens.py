@@ -0,0 +1,63 @@
+"""
+Refresh token rotation
+چرخش توکن تازه‌سازی
+"""
+from datetime import datetime, timedelta, timezone
+import time
+import jwt
+from app.core.config import settings
+from app.core.revocation import prune_expired_revocations, revoked_tokens, token_revocations
+from app.core.security import create_refresh_token
+from app.db.models.token import RevokedToken, UserTokenRevocation
+from app.db.models.user import User
+
+REFRESH_URL = "/api/v1/auth/auth/refresh"
+
+
+def test_refresh_token_is_rotated(client, admin):
+    token = create_refresh_token(data={"sub": admin.id})
+
+    assert client.post(REFRESH_URL, params={"refresh_token": token}).status_code == 200
+    assert client.post(REFRESH_URL, params={"refresh_token": token}).status_code == 401
+
+
+def test_legacy_refresh_token_without_jti_is_rotated(client, admin):
+    # Issued before refresh tokens carried a jti / صادر شده پیش از افزودن jti
+    now = datetime.now(timezone.utc)
+    token = jwt.encode(
+        {"sub": admin.id, "type": "refresh", "iat": now, "exp": now + timedelta(days=1)},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM
+    )
+
+    assert client.post(REFRESH_URL, params={"refresh_token": token}).status_code == 200
+    assert client.post(REFRESH_URL, params={"refresh_token": token}).status_code == 401
+
+
+def test_revoke_leaves_the_caller_transaction_alone(db, admin):
+    expires_at = int((datetime.now(timezone.utc) + timedelta(days=1)).timestamp())
+    admin = db.merge(admin)
+    admin.full_name = "مدیر جدید"
+
+    assert revoked_tokens.revoke("a" * 32, expires_at)
+    assert not revoked_tokens.revoke("a" * 32, expires_at)
+    # The caller's change was not committed along with the revocation
+    # تغییر فراخواننده همراه با ابطال ثبت نشده است
+    db.rollback()
+    assert db.query(User.full_name).filter(User.id == admin.id).scalar() == "مدیر سیستم"
+    assert db.query(RevokedToken).filter(RevokedToken.jti == "a" * 32).first() is not None
+
+
+def test_expired_revocations_are_pruned(db):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db.add_all([
+        RevokedToken(jti="old", revoked_at=now - timedelta(days=2), expires_at=now - timedelta(days=1)),
+        RevokedToken(jti="live", revoked_at=now, expires_at=now + timedelta(days=1)),
+        UserTokenRevocation(user_id=1, revoked_at=time.time() - token_revocations.retention_seconds - 1),
+        UserTokenRevocation(user_id=2, revoked_at=time.time()),
+    ])
+    db.commit()
+
+    assert prune_expired_revocations(db) == 2
+    assert [jti for jti, in db.query(RevokedToken.jti)] == ["live"]
+    assert [user_id for user_id, in db.query(UserTokenRevocation.user_id)] == [2]
@@ -0,0 +1,65 @@
+"""
+Report row budgets
+سقف سطرهای گزارش
+"""
+from datetime import datetime, timedelta
+import pytest
+from app.api.routes.reports import ReportTooLargeError
+from app.core.config import settings
+from app.db.models import Appointment, Patient, User
+from app.db.models.user import UserRole
+from app.tests.test_report_jobs import _wait_for
+from app.utils.messages_fa import ERROR_MESSAGES
+
+
+def _seed_appointments(db, days):
+    user = User(phone_number="09121111111", password_hash="-", full_name="بیمار تست", role=UserRole.PATIENT)
+    db.add(user)
+    db.flush()
+    patient = Patient(user_id=user.id, national_code="0012345678")
+    db.add(patient)
+    db.flush()
+    db.add_all(
+        Appointment(patient_id=patient.id, appointment_date=datetime.now() - timedelta(days=day), reason="checkup")
+        for day in range(days)
+    )
+    db.commit()
+
+
+def test_unpaginated_report_past_the_cap(client, db, admin_headers, monkeypatch):
+    _seed_appointments(db, 2)
+    url = "/api/v1/reports/reports/advanced/timeseries"
+
+    monkeypatch.setattr(settings, "REPORT_MAX_ROWS", 1)
+    response = client.get(url, params={"entity": "appointments"}, headers=admin_headers)
+    assert response.status_code == 413
+    assert response.json()["detail"] == ERROR_MESSAGES["report_too_large"]
+
+    monkeypatch.setattr(settings, "REPORT_MAX_ROWS", 2)
+    assert len(client.get(url, params={"entity": "appointments"}, headers=admin_headers).json()) == 2
+
+
+def test_export_past_the_cap_is_aborted(client, db, admin_headers, monkeypatch):
+    _seed_appointments(db, 2)
+    url = "/api/v1/reports/reports/advanced/export/appointments"
+
+    monkeypatch.setattr(settings, "REPORT_EXPORT_MAX_ROWS", 2)
+    assert len(client.get(url, headers=admin_headers).text.splitlines()) == 3
+
+    monkeypatch.setattr(settings, "REPORT_EXPORT_MAX_ROWS", 1)
+    with pytest.raises(ReportTooLargeError):
+        client.get(url, headers=admin_headers)
+
+
+def test_job_past_the_cap_fails(client, db, admin_headers, monkeypatch):
+    _seed_appointments(db, 2)
+    monkeypatch.setattr(settings, "REPORT_JOB_MAX_ROWS", 1)
+
+    response = client.post(
+        "/api/v1/reports/reports/jobs/",
+        json={"report_type": "appointments", "format": "csv"},
+        headers=admin_headers
+    )
+    body = _wait_for(client, response.json()["job_id"], admin_headers)
+    assert body["status"] == "failed"
+    assert body["error"] == ERROR_MESSAGES["report_job_too_large"]
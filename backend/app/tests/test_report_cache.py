@@ -0,0 +1,54 @@
+"""
+Report cache invalidation
+ابطال کش گزارش‌ها
+"""
+from sqlalchemy import update
+from app.core.cache import cached_report, report_cache
+from app.db.database import SessionLocal
+from app.db.models import Medication
+
+
+def _add_medication(name):
+    session = SessionLocal()
+    session.add(Medication(name=name, unit_price=1.5))
+    session.commit()
+    session.close()
+
+
+def test_read_overlapping_a_write_is_not_cached():
+    calls = []
+    skips = report_cache.stats()["stale_skips"]
+
+    @cached_report("medications")
+    def report(db=None):
+        calls.append(len(calls))
+        # A write commits while the report is being computed
+        # یک نوشتن در حین محاسبه گزارش ثبت می‌شود
+        if len(calls) == 1:
+            _add_medication("Med-A")
+        return {"call": len(calls)}
+
+    assert report(db=None) == {"call": 1}
+    assert report(db=None) == {"call": 2}
+    assert report(db=None) == {"call": 2}
+    assert report_cache.stats()["stale_skips"] == skips + 1
+
+
+def test_bulk_updates_invalidate(db):
+    _add_medication("Med-A")
+    calls = []
+
+    @cached_report("medications")
+    def report(db=None):
+        calls.append(1)
+        return len(calls)
+
+    report(db=None)
+    db.query(Medication).update({Medication.unit_price: 2.0}, synchronize_session=False)
+    db.commit()
+    report(db=None)
+    db.execute(update(Medication).values(unit_price=3.0))
+    db.commit()
+    report(db=None)
+
+    assert len(calls) == 3
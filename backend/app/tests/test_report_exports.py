@@ -0,0 +1,102 @@
+"""
+Report export tests
+تست‌های خروجی گزارش
+"""
+from datetime import datetime
+import io
+import warnings
+import openpyxl
+import pytest
+from app.api.routes import reports
+from app.db.models import Appointment, Patient, User
+from app.db.models.user import UserRole
+from app.utils.messages_fa import ERROR_MESSAGES
+
+EXPORT_URL = "/api/v1/reports/reports/advanced/export/appointments"
+
+
+APPOINTMENT_DATE = datetime(2025, 3, 1, 10, 30)
+
+
+def _seed_appointment(db):
+    user = User(phone_number="09121111111", password_hash="-", full_name="بیمار تست", role=UserRole.PATIENT)
+    db.add(user)
+    db.flush()
+    patient = Patient(user_id=user.id, national_code="0012345678")
+    db.add(patient)
+    db.flush()
+    appointment = Appointment(patient_id=patient.id, appointment_date=APPOINTMENT_DATE, reason="checkup")
+    db.add(appointment)
+    db.commit()
+    return appointment
+
+
+def test_xlsx_export_without_pyarrow(client, db, admin_headers, monkeypatch):
+    monkeypatch.setattr(reports, "pa", None)
+    appointment = _seed_appointment(db)
+    
+    params = {"format": "xlsx", "start_date": "2025-03-01", "end_date": "2025-03-01"}
+    response = client.get(EXPORT_URL, params=params, headers=admin_headers)
+    assert response.status_code == 200
+    
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        workbook = openpyxl.load_workbook(io.BytesIO(response.content))
+    sheet = workbook.active
+    assert sheet.sheet_view.rightToLeft
+    header, *rows = sheet.iter_rows(values_only=True)
+    assert list(header) == list(reports.AppointmentDetailReport.model_fields)
+    assert len(rows) == 1
+    
+    values = dict(zip(header, rows[0]))
+    assert values["appointment_id"] == appointment.id
+    assert values["patient_name"] == "بیمار تست"
+    assert values["patient_phone"] == "09121111111"
+    assert values["appointment_date"] == APPOINTMENT_DATE
+    assert values["status"] == "Pending"
+    assert values["reason"] == "checkup"
+    assert values["notes"] is None
+    assert sheet["E2"].number_format == "yyyy-mm-dd hh:mm"
+
+
+def test_columnar_export_without_pyarrow(client, db, admin_headers, monkeypatch):
+    monkeypatch.setattr(reports, "pa", None)
+    _seed_appointment(db)
+    
+    for export_format in ("parquet", "arrow"):
+        response = client.get(EXPORT_URL, params={"format": export_format}, headers=admin_headers)
+        assert response.status_code == 501
+        assert response.json()["detail"] == ERROR_MESSAGES["columnar_export_unavailable"]
+
+
+
+def test_columnar_exports_read_back(client, db, admin_headers):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    appointment = _seed_appointment(db)
+    fields = list(reports.AppointmentDetailReport.model_fields)
+    params = {"start_date": "2025-03-01", "end_date": "2025-03-01"}
+    
+    response = client.get(EXPORT_URL, params={**params, "format": "parquet"}, headers=admin_headers)
+    assert response.status_code == 200
+    parquet_table = pq.read_table(io.BytesIO(response.content))
+    
+    response = client.get(EXPORT_URL, params={**params, "format": "arrow"}, headers=admin_headers)
+    assert response.status_code == 200
+    arrow_table = pa.ipc.open_stream(response.content).read_all()
+    
+    for table in (parquet_table, arrow_table):
+        assert table.schema.names == fields
+        assert table.num_rows == 1
+        assert table.schema.field("appointment_id").type == pa.int64()
+        assert table.schema.field("appointment_date").type == pa.timestamp("us")
+        assert pa.types.is_dictionary(table.schema.field("status").type)
+        assert not table.schema.field("patient_name").nullable
+        assert table.schema.field("notes").nullable
+        
+        row = table.to_pylist()[0]
+        assert row["appointment_id"] == appointment.id
+        assert row["patient_name"] == "بیمار تست"
+        assert row["appointment_date"] == APPOINTMENT_DATE
+        assert row["status"] == "Pending"
+        assert row["notes"] is None
@@ -0,0 +1,92 @@
+"""
+Background report jobs
+کارهای پس‌زمینه گزارش
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from app.api.routes import report_jobs
+from app.api.routes.report_jobs import ReportJob, _metadata_path
+from app.db.schemas.report import ReportExportRequest
+from app.utils.messages_fa import ERROR_MESSAGES
+
+
+def _wait_for(client, job_id, headers):
+    for _ in range(100):
+        body = client.get(f"/api/v1/reports/reports/jobs/{job_id}", headers=headers).json()
+        if body["status"] in ("completed", "failed"):
+            return body
+        time.sleep(0.05)
+    raise AssertionError("report job did not finish")
+
+
+def test_job_state_is_read_from_metadata_file(client, admin_headers):
+    response = client.post(
+        "/api/v1/reports/reports/jobs/",
+        json={"report_type": "patients", "format": "csv"},
+        headers=admin_headers
+    )
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    assert _wait_for(client, job_id, admin_headers)["status"] == "completed"
+    assert os.path.exists(_metadata_path(job_id))
+
+    download = client.get(f"/api/v1/reports/reports/jobs/{job_id}/download", headers=admin_headers)
+    assert download.status_code == 200
+    assert download.text.splitlines() == [",".join(report_jobs.REPORT_FIELDS["patients"])]
+
+
+def test_job_of_another_worker_is_found(client, admin, admin_headers):
+    # Saved by a different process: nothing about it is in this worker's memory
+    # ذخیره شده توسط پروسه دیگر: چیزی از آن در حافظه این کارگر نیست
+    os.makedirs(report_jobs.settings.REPORT_JOB_DIR, exist_ok=True)
+    job = ReportJob(admin.id, ReportExportRequest(report_type="appointments", format="json"))
+    job.status, job.rows_written, job.total_rows = "running", 5, 10
+    job.save()
+
+    body = client.get(f"/api/v1/reports/reports/jobs/{job.job_id}", headers=admin_headers).json()
+    assert body["status"] == "running"
+    assert body["progress"] == 0.5
+
+    download = client.get(f"/api/v1/reports/reports/jobs/{job.job_id}/download", headers=admin_headers)
+    assert download.status_code == 409
+
+
+def test_invalid_job_id_is_not_found(client, admin_headers):
+    assert client.get("/api/v1/reports/reports/jobs/..%2Fsecret", headers=admin_headers).status_code == 404
+
+
+def test_job_counts_rows_only_when_asked(client, admin_headers):
+    for count_rows, total_rows in ((False, None), (True, 0)):
+        response = client.post(
+            "/api/v1/reports/reports/jobs/",
+            json={"report_type": "patients", "format": "json", "count_rows": count_rows},
+            headers=admin_headers
+        )
+        body = _wait_for(client, response.json()["job_id"], admin_headers)
+        assert body["status"] == "completed"
+        assert body["total_rows"] == total_rows
+
+
+def test_abandoned_job_fails_and_is_purged(client, admin, admin_headers):
+    # Left running by a worker that stopped / رها شده توسط کارگر متوقف شده
+    os.makedirs(report_jobs.settings.REPORT_JOB_DIR, exist_ok=True)
+    job = ReportJob(admin.id, ReportExportRequest(report_type="appointments", format="json"))
+    job.status = "running"
+    job.deadline = datetime.now() - timedelta(minutes=1)
+    job.save()
+    with open(job.file_path + ".part", "w") as partial:
+        partial.write("[")
+
+    body = client.get(f"/api/v1/reports/reports/jobs/{job.job_id}", headers=admin_headers).json()
+    assert body["status"] == "failed"
+    assert body["error"] == ERROR_MESSAGES["report_job_timed_out"]
+
+    expired = ReportJob.load(job.job_id)
+    expired.finish("failed", datetime.now() - timedelta(minutes=report_jobs.settings.REPORT_JOB_RESULT_TTL_MINUTES + 1))
+    assert client.get(f"/api/v1/reports/reports/jobs/{job.job_id}", headers=admin_headers).status_code == 404
+
+    assert report_jobs.purge_expired_jobs() == 1
+    assert not os.path.exists(job.file_path + ".part")
+    assert not os.path.exists(_metadata_path(job.job_id))
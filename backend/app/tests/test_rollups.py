@@ -0,0 +1,85 @@
+"""
+Daily appointment rollup upserts
+درج یا بروزرسانی جدول تجمیعی روزانه نوبت‌ها
+"""
+from datetime import datetime
+from app.db.models import Appointment, Patient, User
+from app.db.models.appointment import AppointmentStatus
+from app.db.models.report import DailyAppointmentRollup
+from app.db.models.user import UserRole
+from app.db.rollups import apply_appointment_delta, track_appointment, untrack_patient_appointments
+
+DAILY_URL = "/api/v1/reports/reports/advanced/daily-appointments"
+
+
+def _counts(db):
+    row = db.query(DailyAppointmentRollup).one()
+    return row.pending, row.confirmed, row.completed, row.canceled
+
+
+def _add_patient(db, phone_number="09121111111", national_code="0012345678"):
+    user = User(phone_number=phone_number, password_hash="-", full_name="بیمار تست", role=UserRole.PATIENT)
+    db.add(user)
+    db.flush()
+    patient = Patient(user_id=user.id, national_code=national_code)
+    db.add(patient)
+    db.flush()
+    return patient
+
+
+def _add_appointments(db, patient, *appointments):
+    """Add (date, status) appointments and count them / افزودن و شمارش نوبت‌ها"""
+    for appointment_date, appointment_status in appointments:
+        appointment = Appointment(patient_id=patient.id, appointment_date=appointment_date,
+                                  status=appointment_status, reason="checkup")
+        db.add(appointment)
+        track_appointment(db, appointment)
+    db.commit()
+
+
+def test_apply_delta_inserts_then_increments(db):
+    day = datetime(2025, 3, 1, 10, 30)
+    apply_appointment_delta(db, day, AppointmentStatus.PENDING, 1)
+    apply_appointment_delta(db, day, AppointmentStatus.PENDING, 1)
+    apply_appointment_delta(db, day, AppointmentStatus.CONFIRMED, 1)
+    apply_appointment_delta(db, day, AppointmentStatus.PENDING, -1)
+    db.commit()
+
+    assert _counts(db) == (1, 1, 0, 0)
+
+
+def test_track_and_untrack_patient_appointments(db):
+    first, second = _add_patient(db), _add_patient(db, "09122222222", "0012345679")
+    _add_appointments(db, first,
+                      (datetime(2025, 3, 1, 9), AppointmentStatus.COMPLETED),
+                      (datetime(2025, 3, 1, 11), AppointmentStatus.COMPLETED))
+    _add_appointments(db, second, (datetime(2025, 3, 1, 10), AppointmentStatus.CANCELED))
+    assert _counts(db) == (0, 0, 2, 1)
+
+    untrack_patient_appointments(db, first.id)
+    db.commit()
+    assert _counts(db) == (0, 0, 0, 1)
+
+
+def test_daily_appointments_by_bucket(client, db, admin_headers):
+    patient = _add_patient(db)
+    _add_appointments(db, patient,
+                      (datetime(2024, 12, 31, 9), AppointmentStatus.PENDING),
+                      (datetime(2025, 1, 15, 9), AppointmentStatus.CONFIRMED),
+                      (datetime(2025, 1, 20, 9), AppointmentStatus.CONFIRMED),
+                      (datetime(2025, 2, 3, 9), AppointmentStatus.CANCELED))
+    params = {"start_date": "2024-12-01", "end_date": "2025-02-28"}
+
+    def report(bucket):
+        response = client.get(DAILY_URL, params={**params, "bucket": bucket}, headers=admin_headers)
+        assert response.status_code == 200
+        return [(row["date"], row["total_appointments"], row["confirmed"]) for row in response.json()]
+
+    assert report("day") == [
+        ("2024-12-31", 1, 0), ("2025-01-15", 1, 1), ("2025-01-20", 1, 1), ("2025-02-03", 1, 0)
+    ]
+    assert report("month") == [("2024-12-01", 1, 0), ("2025-01-01", 2, 2), ("2025-02-01", 1, 0)]
+    assert report("year") == [("2024-01-01", 1, 0), ("2025-01-01", 3, 2)]
+
+    response = client.get(DAILY_URL, params={**params, "bucket": "week"}, headers=admin_headers)
+    assert response.status_code == 422
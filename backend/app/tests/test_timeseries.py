@@ -0,0 +1,69 @@
+"""
+Timeseries report buckets
+بازه‌های زمانی گزارش سری زمانی
+"""
+from datetime import datetime
+from app.db.models import Appointment, Patient, User
+from app.db.models.appointment import AppointmentStatus
+from app.db.models.user import UserRole
+from app.utils.messages_fa import ERROR_MESSAGES
+
+TIMESERIES_URL = "/api/v1/reports/reports/advanced/timeseries"
+
+
+def _seed_appointments(db, *appointments):
+    user = User(phone_number="09121111111", password_hash="-", full_name="بیمار تست", role=UserRole.PATIENT)
+    db.add(user)
+    db.flush()
+    patient = Patient(user_id=user.id, national_code="0012345678")
+    db.add(patient)
+    db.flush()
+    db.add_all(
+        Appointment(patient_id=patient.id, appointment_date=appointment_date, status=appointment_status,
+                    reason="checkup")
+        for appointment_date, appointment_status in appointments
+    )
+    db.commit()
+
+
+def _series(client, headers, **params):
+    params = {"entity": "appointments", "start_date": "2025-02-01", "end_date": "2025-03-31", **params}
+    response = client.get(TIMESERIES_URL, params=params, headers=headers)
+    assert response.status_code == 200
+    return [(point["bucket_start"], point["series"], point["count"]) for point in response.json()]
+
+
+def test_week_and_month_boundaries(client, db, admin_headers):
+    _seed_appointments(
+        db,
+        (datetime(2025, 2, 28, 23, 30), AppointmentStatus.PENDING),    # Friday, last day of February
+        (datetime(2025, 3, 2, 18, 0), AppointmentStatus.PENDING),      # Sunday
+        (datetime(2025, 3, 3, 8, 0), AppointmentStatus.COMPLETED),     # Monday
+    )
+
+    # Weeks start on Monday: Sunday belongs to the week before
+    # هفته از دوشنبه شروع می‌شود: یکشنبه متعلق به هفته قبل است
+    assert _series(client, admin_headers, bucket="week") == [("2025-02-24", None, 2), ("2025-03-03", None, 1)]
+    assert _series(client, admin_headers, bucket="month") == [("2025-02-01", None, 1), ("2025-03-01", None, 2)]
+    assert _series(client, admin_headers, bucket="day") == [
+        ("2025-02-28", None, 1), ("2025-03-02", None, 1), ("2025-03-03", None, 1)
+    ]
+    assert _series(client, admin_headers, bucket="week", split="status") == [
+        ("2025-02-24", "Pending", 2), ("2025-03-03", "Completed", 1)
+    ]
+
+
+def test_bad_split_is_rejected(client, admin_headers):
+    # A split the entity does not have / تفکیکی که این نوع داده ندارد
+    response = client.get(TIMESERIES_URL, params={"entity": "factors", "split": "status"}, headers=admin_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == ERROR_MESSAGES["invalid_timeseries_split"]
+
+    response = client.get(TIMESERIES_URL, params={"entity": "prescriptions", "split": "factor_type"},
+                          headers=admin_headers)
+    assert response.status_code == 400
+
+    # Unknown split or bucket / تفکیک یا بازه ناشناخته
+    for params in ({"split": "doctor"}, {"bucket": "year"}):
+        response = client.get(TIMESERIES_URL, params={"entity": "appointments", **params}, headers=admin_headers)
+        assert response.status_code == 422
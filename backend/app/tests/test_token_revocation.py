@@ -0,0 +1,84 @@
+"""
+Per-user token revocation across workers
+ابطال توکن‌های کاربر بین کارگرها
+"""
+from datetime import datetime
+import app.core.security as security
+from app.core.revocation import TokenRevocationList
+from app.db.models import Appointment, Patient
+from app.db.models.user import User, UserRole
+
+
+def test_revocation_reaches_other_worker(client, db, admin_headers, make_headers, monkeypatch):
+    secretary = User(phone_number="09120000001", password_hash="-", full_name="منشی", role=UserRole.SECRETARY)
+    db.add(secretary)
+    db.commit()
+    headers = make_headers(secretary)
+
+    # A second worker: its memory never sees this worker's commits
+    # کارگر دوم: حافظه آن تغییرات ثبت شده در این کارگر را نمی‌بیند
+    other_worker = TokenRevocationList(retention_seconds=1800, sync_seconds=0)
+    monkeypatch.setattr(security, "token_revocations", other_worker)
+    assert client.get("/api/v1/users/users/me", headers=headers).status_code == 200
+
+    response = client.put(
+        f"/api/v1/users/users/{secretary.id}",
+        json={"is_active": False},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/users/users/me", headers=headers).status_code == 401
+
+
+def test_rolled_back_change_does_not_revoke(db):
+    secretary = User(phone_number="09120000001", password_hash="-", full_name="منشی", role=UserRole.SECRETARY)
+    db.add(secretary)
+    db.commit()
+
+    secretary.role = UserRole.ADMIN
+    db.flush()
+    db.rollback()
+
+    worker = TokenRevocationList(retention_seconds=1800, sync_seconds=0)
+    assert not worker.is_revoked(db, secretary.id, 0)
+
+
+def test_cached_user_is_reloaded_after_change_on_other_worker(client, db, admin_headers, monkeypatch):
+    secretary = User(phone_number="09120000001", password_hash="-", full_name="منشی", role=UserRole.SECRETARY)
+    db.add(secretary)
+    db.commit()
+    # Token without claims, served through the auth cache / توکن بدون اطلاعات کاربر، از طریق کش
+    headers = {"Authorization": f"Bearer {security.create_access_token(data={'sub': secretary.id})}"}
+
+    other_worker = TokenRevocationList(retention_seconds=1800, sync_seconds=0)
+    monkeypatch.setattr(security, "token_revocations", other_worker)
+    assert client.get("/api/v1/users/users/me", headers=headers).status_code == 200
+    assert client.get("/api/v1/users/users/me", headers=headers).status_code == 200
+    assert security.auth_user_cache.stats()["hits"] >= 1
+
+    response = client.put(
+        f"/api/v1/users/users/{secretary.id}",
+        json={"is_active": False},
+        headers=admin_headers
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/v1/users/users/me", headers=headers).status_code == 403
+
+
+def test_patient_claim_with_and_without_token_claims(client, db, make_headers):
+    user = User(phone_number="09120000002", password_hash="-", full_name="بیمار", role=UserRole.PATIENT)
+    db.add(user)
+    db.flush()
+    patient = Patient(user_id=user.id, national_code="0012345678")
+    db.add(patient)
+    db.flush()
+    db.add(Appointment(patient_id=patient.id, appointment_date=datetime.now(), reason="checkup"))
+    db.commit()
+
+    legacy = {"Authorization": f"Bearer {security.create_access_token(data={'sub': user.id})}"}
+    for headers in (make_headers(user), legacy):
+        response = client.get("/api/v1/appointments/appointments/my", headers=headers)
+        assert response.status_code == 200
+        assert [appointment["patient_id"] for appointment in response.json()] == [patient.id]
@@ -11,6 +11,7 @@ ERROR_MESSAGES = {
     "token_expired": "توکن منقضی شده است",
     "inactive_user": "حساب کاربری غیرفعال است",
     "user_not_found": "کاربر یافت نشد",
+    "too_many_login_attempts": "تعداد تلاش‌های ورود بیش از حد مجاز است، لطفا کمی بعد دوباره تلاش کنید",
     
     # Authorization / مجوزدهی
     "admin_only": "فقط مدیران اجازه دسترسی دارند",
@@ -54,6 +55,24 @@ ERROR_MESSAGES = {
     # Support / پشتیبانی
     "support_chat_not_found": "گفتگو یافت نشد",
     
+    # Server / سرور
+    "server_busy": "سرور مشغول است، لطفا چند لحظه دیگر تلاش کنید",
+    
+    # Reports / گزارشات
+    "invalid_cursor": "توکن صفحه‌بندی نامعتبر است",
+    "invalid_report_type": "نوع گزارش نامعتبر است",
+    "invalid_report_format": "فرمت خروجی نامعتبر است",
+    "report_job_not_found": "کار گزارش یافت نشد",
+    "report_job_not_ready": "گزارش هنوز آماده نشده است",
+    "report_job_queue_full": "صف تولید گزارش پر است، لطفا بعدا تلاش کنید",
+    "report_job_timed_out": "زمان تولید گزارش به پایان رسید",
+    "invalid_timeseries_split": "تفکیک انتخاب شده برای این نوع داده پشتیبانی نمی‌شود",
+    "report_too_large": "حجم گزارش بیش از حد مجاز است؛ بازه تاریخ را محدودتر کنید یا از خروجی پس‌زمینه استفاده کنید",
+    "report_job_too_large": "حجم گزارش بیش از حد مجاز کار پس‌زمینه است؛ بازه تاریخ را محدودتر کنید",
+    "delta_watermark_expired": "نشانه زمانی همگام‌سازی منقضی شده است؛ گزارش کامل را دوباره دریافت کنید",
+    "report_timeout": "زمان اجرای گزارش بیش از حد مجاز شد، لطفا بازه کوچک‌تری انتخاب کنید",
+    "columnar_export_unavailable": "خروجی Parquet/Arrow در این سرور فعال نیست (کتابخانه pyarrow نصب نشده است)",
+    
     # General / عمومی
     "internal_error": "خطای داخلی سرور",
     "validation_error": "اطلاعات ورودی نامعتبر است",
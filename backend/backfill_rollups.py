@@ -0,0 +1,23 @@
+"""
+Rebuild Report Rollups Script
+بازسازی جداول تجمیعی گزارش
+"""
+from app.db.database import SessionLocal, engine, Base
+from app.db.rollups import rebuild_daily_appointment_rollup
+
+
+def backfill_rollups():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        days = rebuild_daily_appointment_rollup(db)
+        print(f"✅ Daily appointment rollup rebuilt ({days} days)")
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        db.rollback()
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    backfill_rollups()
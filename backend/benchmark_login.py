@@ -0,0 +1,148 @@
+"""
+Login Benchmark Script
+سنجش تاخیر ورود کاربران عادی در حین حمله به /auth/login
+
+Measures legitimate login latency on a running server, first alone and then
+while a flood of wrong-password attempts arrives from another address.
+تاخیر ورود کاربران عادی را ابتدا به تنهایی و سپس در حین حمله اندازه می‌گیرد.
+
+Usage / نحوه استفاده:
+    python benchmark_login.py --phone 09120000001 --phone 09120000002 --password secret1
+
+Each user logs in from its own 127.0.1.x address and the attack comes from
+127.0.0.2 (Linux loopback), so the per-IP limit can tell them apart.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client / کلاینت ساده HTTP با اتصال پایدار"""
+
+    def __init__(self, host: str, port: int, local_addr=None):
+        self.host, self.port, self.local_addr = host, port, local_addr
+        self.reader = self.writer = None
+
+    async def post_json(self, path: str, body: dict) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, local_addr=self.local_addr
+            )
+        payload = json.dumps(body).encode()
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:] if ": " in line)
+        headers = {key.lower(): value for key, value in headers.items()}
+        await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection") == "close":
+            self.writer.close()
+            self.writer = None
+        return int(lines[0].split(" ")[1])
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(int(len(samples) * fraction), len(samples) - 1)] * 1000, 1)
+
+
+async def legitimate_logins(host, port, phones, password, rate, duration, timeout):
+    """Sequential logins by real users / ورود ترتیبی کاربران واقعی"""
+    # One loopback address per user, as real users arrive from their own IPs
+    # هر کاربر از آدرس جداگانه، مانند کاربران واقعی
+    connections = [Connection(host, port, local_addr=(f"127.0.1.{i + 1}", 0)) for i in range(len(phones))]
+    latencies, statuses = [], Counter()
+    deadline = time.monotonic() + duration
+    index = 0
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        connection = connections[index % len(phones)]
+        try:
+            status = await asyncio.wait_for(connection.post_json(
+                "/api/v1/auth/auth/login", {"phone_number": phones[index % len(phones)], "password": password}
+            ), timeout)
+        except asyncio.TimeoutError:
+            status = "timeout"
+            connection.writer.close()
+            connection.writer = None
+        latencies.append(time.monotonic() - started)
+        statuses[status] += 1
+        index += 1
+        await asyncio.sleep(max(0.0, 1 / rate - (time.monotonic() - started)))
+    return latencies, statuses
+
+
+async def attack(host, port, phones, rate, duration, connections):
+    """Paced wrong-password flood from 127.0.0.2 / حمله با رمز اشتباه از 127.0.0.2"""
+    statuses = Counter()
+    started = time.monotonic()
+    total = int(rate * duration)
+    counter = iter(range(total))
+
+    async def worker():
+        connection = Connection(host, port, local_addr=("127.0.0.2", 0))
+        for sent in counter:
+            if time.monotonic() > started + duration:
+                break
+            delay = started + sent / rate - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Known accounts, so every accepted attempt costs a bcrypt check
+            # حساب‌های موجود، تا هر تلاش پذیرفته شده یک بررسی bcrypt داشته باشد
+            phone = random.choice(phones)
+            try:
+                statuses[await connection.post_json(
+                    "/api/v1/auth/auth/login", {"phone_number": phone, "password": "wrong-password"}
+                )] += 1
+            except (OSError, asyncio.IncompleteReadError):
+                statuses["error"] += 1
+                connection.writer = None
+
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    elapsed = time.monotonic() - started
+    return sum(statuses.values()) / elapsed, statuses
+
+
+def report(title, latencies, statuses):
+    print(f"{title}: {len(latencies)} logins, p50 {percentile(latencies, 0.5)} ms, "
+          f"p95 {percentile(latencies, 0.95)} ms, max {percentile(latencies, 1.0)} ms, statuses {dict(statuses)}")
+
+
+async def main(args):
+    url = urlsplit(args.base_url)
+    host, port = url.hostname, url.port or 80
+
+    latencies, statuses = await legitimate_logins(host, port, args.phone, args.password, args.legit_rate, args.duration, args.timeout)
+    report("Baseline / بدون حمله", latencies, statuses)
+
+    (latencies, statuses), (attack_rate, attack_statuses) = await asyncio.gather(
+        legitimate_logins(host, port, args.phone, args.password, args.legit_rate, args.duration, args.timeout),
+        attack(host, port, args.phone, args.attack_rate, args.duration, args.connections),
+    )
+    report("Under attack / در حین حمله", latencies, statuses)
+    print(f"Attack: {attack_rate:.0f} req/s, statuses {dict(attack_statuses)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login latency under a login flood")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--phone", action="append", required=True, help="legitimate user phone (repeatable)")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--legit-rate", type=float, default=1.0, help="legitimate logins per second")
+    parser.add_argument("--attack-rate", type=float, default=1000.0, help="attack requests per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per phase")
+    parser.add_argument("--timeout", type=float, default=10.0, help="legitimate login timeout in seconds")
+    parser.add_argument("--connections", type=int, default=64, help="attack connections")
+    asyncio.run(main(parser.parse_args()))
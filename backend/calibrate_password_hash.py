@@ -0,0 +1,73 @@
+"""
+Password Hash Calibration Script
+تنظیم هزینه رمزنگاری رمز عبور بر اساس سخت‌افزار
+
+Measures hash time on this host for increasing costs and prints the highest
+cost that stays within the latency budget (PASSWORD_HASH_TARGET_MS by default).
+زمان رمزنگاری را روی این سرور اندازه می‌گیرد و بیشترین هزینه در محدوده زمان مجاز را پیشنهاد می‌دهد.
+
+Usage / نحوه استفاده:
+    python calibrate_password_hash.py [--scheme bcrypt|argon2] [--target-ms 250]
+
+Existing hashes with another cost are rehashed at each user's next login.
+"""
+import argparse
+import statistics
+import time
+from app.core.config import settings
+from app.core.security import PASSWORD_HASH_SCHEMES, build_password_context
+
+BCRYPT_ROUNDS_RANGE = range(10, 17)
+ARGON2_TIME_COST_RANGE = range(1, 11)
+
+
+def measure_ms(context, samples: int) -> float:
+    """Median hash time in milliseconds / میانه زمان رمزنگاری به میلی‌ثانیه"""
+    context.hash("calibration-password")  # warm up the backend
+    durations = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash("calibration-password")
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+def calibrate(scheme: str, target_ms: float, samples: int) -> dict:
+    # Cost doubles (bcrypt) or grows linearly (argon2 time cost); stop at the first one over budget
+    # هزینه bcrypt دو برابر و argon2 خطی افزایش می‌یابد؛ با عبور از بودجه متوقف می‌شود
+    if scheme == "bcrypt":
+        name, costs = "BCRYPT_ROUNDS", BCRYPT_ROUNDS_RANGE
+        build = lambda cost: build_password_context("bcrypt", bcrypt_rounds=cost)
+    else:
+        name, costs = "ARGON2_TIME_COST", ARGON2_TIME_COST_RANGE
+        build = lambda cost: build_password_context("argon2", argon2_time_cost=cost)
+    
+    chosen = None
+    for cost in costs:
+        elapsed = measure_ms(build(cost), samples)
+        print(f"  {name}={cost}: {elapsed:.0f} ms")
+        if elapsed > target_ms:
+            break
+        chosen = cost
+    
+    if chosen is None:
+        chosen = costs[0]
+        print(f"⚠️  Even the lowest cost exceeds {target_ms:.0f} ms on this host")
+    return {"PASSWORD_HASH_SCHEME": scheme, name: chosen}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pick the password hash cost for this host")
+    parser.add_argument("--scheme", choices=PASSWORD_HASH_SCHEMES, default=settings.PASSWORD_HASH_SCHEME)
+    parser.add_argument("--target-ms", type=float, default=settings.PASSWORD_HASH_TARGET_MS)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"🔐 Calibrating {args.scheme} for {args.target_ms:.0f} ms per hash")
+    if args.scheme == "argon2":
+        print(f"  memory_cost={settings.ARGON2_MEMORY_COST} KiB, parallelism={settings.ARGON2_PARALLELISM}")
+    
+    recommended = calibrate(args.scheme, args.target_ms, args.samples)
+    print("✅ Add to .env:")
+    for key, value in recommended.items():
+        print(f"{key}={value}")
@@ -0,0 +1,25 @@
+"""
+Create Report Indexes Script
+ایجاد ایندکس‌های گزارش روی دیتابیس موجود
+"""
+from app.db.database import engine, Base
+from app.db.models import Appointment, Factor, DeletedRecord
+
+
+def create_report_indexes():
+    # New tables (e.g. deleted_records) / جداول جدید
+    Base.metadata.create_all(bind=engine)
+    
+    # create_all does not add indexes to existing tables
+    # create_all ایندکس جدید را به جداول موجود اضافه نمی‌کند
+    for table in (Appointment.__table__, Factor.__table__, DeletedRecord.__table__):
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+                print(f"✅ {index.name}")
+            except Exception as e:
+                print(f"❌ {index.name}: {str(e)}")
+
+
+if __name__ == "__main__":
+    create_report_indexes()